@@ -0,0 +1,89 @@
+"""Ресурсы API: публичные поля и соответствующие им пути в ORM.
+
+Ответы строятся из values(), без создания объектов моделей: в запрос
+попадают только запрошенные через ?fields= поля (плюс ключ курсора),
+а связанные значения вроде имени автора берутся JOIN-ом.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from posts.utils import POSTS_ORDERING
+
+
+def media_url(name: str) -> Optional[str]:
+    return f"{settings.MEDIA_URL}{name}" if name else None
+
+
+class Resource:
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        ordering: Tuple[str, ...],
+        converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    ):
+        self.fields = fields
+        self.ordering = ordering
+        self.converters = converters or {}
+
+    def paths(self, fields: Iterable[str]) -> List[str]:
+        """Пути для values(): запрошенные поля и поля курсора."""
+        paths = [self.fields[name] for name in fields]
+        for field in self.ordering:
+            path = field.lstrip("-")
+            if path not in paths:
+                paths.append(path)
+        return paths
+
+    def serialize(self, row: dict, fields: Iterable[str]) -> dict:
+        item = {}
+        for name in fields:
+            value = row[self.fields[name]]
+            converter = self.converters.get(name)
+            item[name] = converter(value) if converter else value
+        return item
+
+
+POST = Resource(
+    fields={
+        "id": "id",
+        "text": "text",
+        "pub_date": "pub_date",
+        "author": "author__username",
+        "group": "group__slug",
+        "image": "image",
+        "comments_count": "comments_count",
+    },
+    ordering=POSTS_ORDERING,
+    converters={"image": media_url},
+)
+
+GROUP = Resource(
+    fields={
+        "id": "id",
+        "title": "title",
+        "slug": "slug",
+        "description": "description",
+    },
+    ordering=("id",),
+)
+
+COMMENT = Resource(
+    fields={
+        "id": "id",
+        "post": "post",
+        "author": "author__username",
+        "text": "text",
+        "created": "created",
+    },
+    ordering=("-created", "-id"),
+)
+
+FOLLOW = Resource(
+    fields={
+        "id": "id",
+        "user": "user__username",
+        "author": "author__username",
+    },
+    ordering=("-id",),
+)
@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import CURSOR_NEXT, encode_cursor
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f"Пост {number}", group=cls.group
+            )
+            for number in range(12)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text="Комментарий"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_posts_are_paged_by_cursor(self):
+        """Список постов листается курсором без повторов."""
+        url = reverse("api:post_list")
+        first = self.client.get(url, {"fields": "id"}).json()
+        second = self.client.get(first["next"]).json()
+        ids = [item["id"] for item in first["results"] + second["results"]]
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+        self.assertIsNone(second["next"])
+        self.assertIsNotNone(second["previous"])
+
+    def test_out_of_range_cursor_returns_first_page(self):
+        """Курсор с числом вне диапазона базы открывает первую страницу."""
+        url = reverse("api:post_list")
+        cursor = encode_cursor(
+            CURSOR_NEXT, [self.posts[0].pub_date.isoformat(), 10**30]
+        )
+        response = self.client.get(url, {"fields": "id", "cursor": cursor})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.json(), self.client.get(url, {"fields": "id"}).json()
+        )
+
+    def test_sparse_fieldsets(self):
+        """?fields= оставляет в ответе только запрошенные поля."""
+        post = self.posts[0]
+        response = self.client.get(
+            reverse("api:post_detail", kwargs={"post_id": post.id}),
+            {"fields": "text,author,group"},
+        )
+        self.assertEqual(
+            response.json(),
+            {"text": post.text, "author": "author", "group": "group"},
+        )
+        response = self.client.get(
+            reverse("api:post_list"), {"fields": "text,password"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_lists_run_a_single_query(self):
+        """Страница списка — один запрос со всеми связанными полями."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse("api:post_list"))
+
+    def test_etag_returns_not_modified(self):
+        """Повторный запрос с If-None-Match получает 304."""
+        url = reverse("api:group_detail", kwargs={"slug": "group"})
+        response = self.client.get(url)
+        self.assertEqual(response.json()["title"], "Группа")
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+        self.group.title = "Новое название"
+        self.group.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, HTTPStatus.OK)
+
+    def test_comments_filters_and_follows(self):
+        """Комментарии, фильтры и подписки текущего пользователя."""
+        comments = self.client.get(
+            reverse("api:comment_list", kwargs={"post_id": self.posts[0].id})
+        ).json()["results"]
+        self.assertEqual([item["text"] for item in comments], ["Комментарий"])
+        by_author = self.client.get(
+            reverse("api:post_list"), {"author": "reader"}
+        ).json()
+        self.assertEqual(by_author["results"], [])
+
+        follows_url = reverse("api:follow_list")
+        self.assertEqual(
+            self.client.get(follows_url).status_code, HTTPStatus.UNAUTHORIZED
+        )
+        self.client.force_login(self.reader)
+        follows = self.client.get(follows_url).json()["results"]
+        self.assertEqual(follows[0]["author"], "author")
+
+    def test_missing_objects_and_methods(self):
+        """Ошибки возвращаются в JSON с нужным статусом."""
+        missing = self.client.get(
+            reverse("api:post_detail", kwargs={"post_id": 0})
+        )
+        self.assertEqual(missing.status_code, HTTPStatus.NOT_FOUND)
+        self.assertIn("detail", missing.json())
+        post = self.client.post(reverse("api:post_list"))
+        self.assertEqual(post.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
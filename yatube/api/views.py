@@ -0,0 +1,154 @@
+import hashlib
+from functools import wraps
+from typing import List, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, JsonResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import quote_etag
+
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import POSTS_LIMIT, CursorPaginator
+
+from .resources import COMMENT, FOLLOW, GROUP, POST, Resource
+
+
+MAX_LIMIT = 100
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def json_response(payload: dict, status: int = 200) -> JsonResponse:
+    return JsonResponse(
+        payload,
+        status=status,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def api_view(view):
+    """Только GET/HEAD, ошибки в JSON, ETag и ответ 304.
+
+    ETag — хэш тела ответа: он экономит трафик и разбор JSON на
+    клиенте, а клиент с совпавшим If-None-Match получает 304.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            response = json_response({"detail": "Метод не разрешен."}, 405)
+            response["Allow"] = "GET, HEAD"
+            return response
+        try:
+            response = json_response(view(request, *args, **kwargs))
+        except ApiError as error:
+            return json_response({"detail": error.detail}, error.status)
+
+        etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie",))
+        return get_conditional_response(request, etag=etag, response=response)
+
+    return wrapper
+
+
+def requested_fields(request: HttpRequest, resource: Resource) -> List[str]:
+    """Поля из ?fields=a,b; без параметра — все поля ресурса."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(resource.fields)
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = sorted(set(fields) - set(resource.fields))
+    if unknown:
+        raise ApiError(400, f"Неизвестные поля: {', '.join(unknown)}.")
+    return fields
+
+
+def page_size(request: HttpRequest) -> int:
+    try:
+        limit = int(request.GET.get("limit", POSTS_LIMIT))
+    except ValueError:
+        raise ApiError(400, "limit должен быть числом.")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def page_link(request: HttpRequest, cursor: Optional[str]) -> Optional[str]:
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query["cursor"] = cursor
+    return f"{request.path}?{query.urlencode()}"
+
+
+def paginated(request: HttpRequest, resource: Resource, records) -> dict:
+    fields = requested_fields(request, resource)
+    paginator = CursorPaginator(
+        records.values(*resource.paths(fields)),
+        page_size(request),
+        resource.ordering,
+    )
+    page = paginator.get_page(request.GET.get("cursor"))
+    return {
+        "results": [resource.serialize(row, fields) for row in page],
+        "next": page_link(request, page.next_cursor),
+        "previous": page_link(request, page.previous_cursor),
+    }
+
+
+def single(request: HttpRequest, resource: Resource, records) -> dict:
+    fields = requested_fields(request, resource)
+    row = records.values(*resource.paths(fields)).first()
+    if row is None:
+        raise ApiError(404, "Не найдено.")
+    return resource.serialize(row, fields)
+
+
+@api_view
+def post_list(request: HttpRequest) -> dict:
+    posts = Post.objects.all()
+    if "group" in request.GET:
+        posts = posts.filter(group__slug=request.GET["group"])
+    if "author" in request.GET:
+        posts = posts.filter(author__username=request.GET["author"])
+    return paginated(request, POST, posts)
+
+
+@api_view
+def post_detail(request: HttpRequest, post_id: int) -> dict:
+    return single(request, POST, Post.objects.filter(id=post_id))
+
+
+@api_view
+def comment_list(request: HttpRequest, post_id: int) -> dict:
+    if not Post.objects.filter(id=post_id).exists():
+        raise ApiError(404, "Не найдено.")
+    return paginated(request, COMMENT, Comment.objects.filter(post=post_id))
+
+
+@api_view
+def group_list(request: HttpRequest) -> dict:
+    return paginated(request, GROUP, Group.objects.all())
+
+
+@api_view
+def group_detail(request: HttpRequest, slug: str) -> dict:
+    return single(request, GROUP, Group.objects.filter(slug=slug))
+
+
+@api_view
+def follow_list(request: HttpRequest) -> dict:
+    """Подписки текущего пользователя."""
+    if not request.user.is_authenticated:
+        raise ApiError(401, "Нужна авторизация.")
+    return paginated(request, FOLLOW, Follow.objects.filter(user=request.user))
@@ -0,0 +1,49 @@
+"""Benchmarks for yatube.
+
+Run from the ``yatube`` directory, for example::
+
+    python -m benchmarks.bench_pagination
+
+Every benchmark works on a throwaway test database, so the development
+``db.sqlite3`` is never touched.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create a test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def timeit(func, repeat=20):
+    """Return the best wall-clock time of ``func`` in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
@@ -0,0 +1,264 @@
+"""Concurrency ceiling of the WSGI and ASGI deployments under slow clients.
+
+    python -m benchmarks.bench_concurrency [--threads 8] [--slow 0 --slow 16]
+
+Both deployments run Django on the same number of threads:
+
+* ``wsgi`` - ``yatube.wsgi`` on a WSGI server that handles connections
+  on a fixed pool of ``--threads`` threads, like gunicorn's gthread
+  worker;
+* ``asgi`` - ``yatube.asgi`` on uvicorn, whose adapter runs Django on a
+  pool of the same size.
+
+For every level N of ``--slow`` the benchmark opens N connections that
+send a POST and then trickle its body a byte at a time, and measures
+how many of ``--requests`` ordinary GET requests finish within
+``--timeout`` and their median latency. A sync thread stays blocked on
+a slow body until it arrives, so the WSGI deployment stalls once N
+reaches the thread count, while the ASGI one reads bodies on the event
+loop and keeps serving. The concurrency ceiling is the largest N at
+which every GET still succeeds.
+
+Requires uvicorn (``pip install uvicorn``).
+"""
+import argparse
+import http.client
+import io
+import logging
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from . import setup_django, test_database
+
+
+HOST = "127.0.0.1"
+SLOW_PATH = "/auth/login/"
+# Large enough that no slow body completes during a measurement.
+SLOW_BODY_SIZE = 100_000
+DEFAULT_LEVELS = (0, 4, 8, 16, 32, 64)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        # Like uvicorn: without it Nagle's algorithm and delayed ACKs
+        # add ~40 ms to every response written in several pieces.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """Handles every connection on a fixed pool of threads."""
+
+    request_queue_size = 256
+
+    def __init__(self, address, threads):
+        super().__init__(address, QuietHandler)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.handle_in_pool, request, client_address)
+
+    def handle_in_pool(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        # Slow clients are dropped mid-body on purpose.
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_wsgi(port, threads):
+    from yatube.wsgi import application
+
+    server = PooledWSGIServer((HOST, port), threads)
+    server.set_app(application)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.pool.shutdown(wait=False)
+        server.server_close()
+
+    return stop
+
+
+def start_asgi(port, threads):
+    import uvicorn
+
+    from core.asgi import AsgiAdapter
+    from yatube.wsgi import application
+
+    config = uvicorn.Config(
+        AsgiAdapter(application, threads),
+        host=HOST,
+        port=port,
+        log_level="error",
+        lifespan="off",
+        backlog=256,
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return stop
+
+
+DEPLOYMENTS = {"wsgi": start_wsgi, "asgi": start_asgi}
+
+
+class SlowClients:
+    """Connections that send a POST body one byte at a time."""
+
+    def __init__(self, port, count, interval):
+        self.interval = interval
+        self.sockets = []
+        for _ in range(count):
+            sock = socket.create_connection((HOST, port))
+            sock.sendall(
+                (
+                    f"POST {SLOW_PATH} HTTP/1.1\r\n"
+                    f"Host: {HOST}\r\n"
+                    # A well-formed CSRF cookie makes the CSRF check read
+                    # the body, as it does for a real form submission.
+                    f"Cookie: csrftoken={'a' * 64}\r\n"
+                    "Content-Type: application/x-www-form-urlencoded\r\n"
+                    f"Content-Length: {SLOW_BODY_SIZE}\r\n\r\n"
+                ).encode()
+            )
+            self.sockets.append(sock)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.trickle, daemon=True)
+        self.thread.start()
+
+    def trickle(self):
+        while not self.stopped.wait(self.interval):
+            for sock in self.sockets:
+                try:
+                    sock.send(b"a")
+                except OSError:
+                    pass
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        for sock in self.sockets:
+            sock.close()
+
+
+def timed_get(port, path, timeout):
+    """Latency of one GET in ms, or None if it did not finish in time."""
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection(HOST, port, timeout=timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 400:
+            return None
+    except OSError:
+        return None
+    finally:
+        connection.close()
+    return (time.perf_counter() - started) * 1000
+
+
+def measure(port, args):
+    with ThreadPoolExecutor(args.clients) as pool:
+        latencies = list(
+            pool.map(
+                lambda _: timed_get(port, "/", args.timeout),
+                range(args.requests),
+            )
+        )
+    done = [latency for latency in latencies if latency is not None]
+    return len(done), statistics.median(done) if done else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--slow", type=int, action="append")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--trickle", type=float, default=0.5)
+    parser.add_argument("--scale", type=float, default=0.01)
+    args = parser.parse_args()
+    levels = sorted(args.slow or DEFAULT_LEVELS)
+
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Real sockets come from 127.0.0.1, one of INTERNAL_IPS: with DEBUG
+    # on, the debug toolbar would instrument every request.
+    settings.DEBUG = False
+    # Slow clients are cut off mid-body, and CSRF complains about each.
+    logging.getLogger("django.security.csrf").setLevel(logging.ERROR)
+
+    results = {}
+    with test_database():
+        call_command("seed_data", scale=args.scale, stdout=io.StringIO())
+        for name, start in DEPLOYMENTS.items():
+            port = free_port()
+            stop = start(port, args.threads)
+            timed_get(port, "/", args.timeout)
+            for level in levels:
+                slow = SlowClients(port, level, args.trickle)
+                # Let the server pick up the slow connections first.
+                time.sleep(args.trickle)
+                results[name, level] = measure(port, args)
+                slow.close()
+                time.sleep(args.trickle)
+            stop()
+
+    print(f"{args.threads} threads, {args.requests} GET requests per level")
+    header = "".join(f"{name:>22}" for name in DEPLOYMENTS)
+    print(f"{'slow clients':<14}{header}")
+    for level in levels:
+        cells = []
+        for name in DEPLOYMENTS:
+            done, median = results[name, level]
+            latency = f"{median:.0f} ms" if median is not None else "-"
+            cells.append(f"{done:>3}/{args.requests} ok, {latency:>7}")
+        print(f"{level:<14}" + "".join(f"{cell:>22}" for cell in cells))
+    for name in DEPLOYMENTS:
+        ceiling = max(
+            (
+                level
+                for level in levels
+                if results[name, level][0] == args.requests
+            ),
+            default=None,
+        )
+        print(f"{name} concurrency ceiling: {ceiling} slow clients")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Image bytes shipped with one index page, before and after srcset.
+
+    python -m benchmarks.bench_images [--viewport 375x2 --viewport 1280x1]
+
+"Before" is the single 960x339 JPEG crop every listing used to ship for
+all posts on the page. "After" picks, for every viewport, the candidate
+a browser would take from the card ``srcset`` (the smallest width that
+covers the slot at the device pixel ratio) in WebP and in JPEG, and also
+counts only the images above the fold, which is what ``loading="lazy"``
+downloads before the reader scrolls.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+from io import BytesIO
+
+from . import setup_django, test_database
+
+
+def make_photo(seed, size=(1600, 1067)):
+    """A photo-like JPEG: smooth gradient with some sensor noise."""
+    from PIL import Image, ImageFilter
+
+    rng = random.Random(seed)
+    base = Image.linear_gradient("L").resize(size).rotate(rng.randint(0, 359))
+    noise = Image.effect_noise(size, 40).filter(ImageFilter.GaussianBlur(1))
+    channels = [
+        Image.blend(base, noise, rng.uniform(0.2, 0.6)) for _ in range(3)
+    ]
+    buffer = BytesIO()
+    Image.merge("RGB", channels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def parse_viewport(value):
+    width, _, ratio = value.partition("x")
+    return int(width), float(ratio or 1)
+
+
+def pick(candidates, slot):
+    """Candidate a browser would choose for a slot of ``slot`` pixels."""
+    for width, size in candidates:
+        if width >= slot:
+            return size
+    return candidates[-1][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--viewport",
+        action="append",
+        type=parse_viewport,
+        help="CSS width x device pixel ratio, e.g. 375x2.",
+    )
+    parser.add_argument(
+        "--above-fold",
+        type=int,
+        default=2,
+        help="Cards visible before scrolling.",
+    )
+    args = parser.parse_args()
+    viewports = args.viewport or [(320, 1.0), (412, 1.5), (1280, 1.0)]
+
+    setup_django()
+    from django.core.files.base import ContentFile
+    from django.test import override_settings
+    from sorl.thumbnail import get_thumbnail
+
+    from posts.models import Post
+    from posts.thumbnails import (
+        CARD_FORMATS,
+        CARD_OPTIONS,
+        CARD_QUALITY,
+        CARD_WIDTHS,
+        card_geometry,
+    )
+    from posts.utils import POSTS_LIMIT
+
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root), test_database():
+            from django.contrib.auth import get_user_model
+
+            author = get_user_model().objects.create_user(username="bench")
+            images = []
+            for number in range(POSTS_LIMIT):
+                post = Post(author=author, text=f"post {number}")
+                post.image.save(
+                    f"bench_{number}.jpg", ContentFile(make_photo(number))
+                )
+                images.append(post.image)
+
+            def size_of(thumbnail):
+                return thumbnail.storage.size(thumbnail.name)
+
+            before = [
+                size_of(get_thumbnail(image, "960x339", **CARD_OPTIONS))
+                for image in images
+            ]
+            candidates = {
+                key: [
+                    [
+                        (
+                            width,
+                            size_of(
+                                get_thumbnail(
+                                    image,
+                                    card_geometry(width),
+                                    format=thumbnail_format,
+                                    quality=CARD_QUALITY,
+                                    **CARD_OPTIONS,
+                                )
+                            ),
+                        )
+                        for width in CARD_WIDTHS
+                    ]
+                    for image in images
+                ]
+                for key, thumbnail_format in CARD_FORMATS.items()
+            }
+
+            fold = args.above_fold
+            print(f"{POSTS_LIMIT} cards per index page, {fold} above the fold")
+            header = f"{'all, KB':>10}{'eager, KB':>12}"
+            print(f"{'viewport':<12}{'variant':<18}{header}")
+            for css_width, ratio in viewports:
+                slot = min(css_width, max(CARD_WIDTHS)) * ratio
+                rows = {"before (960 jpeg)": before}
+                for key in CARD_FORMATS:
+                    rows[f"srcset {key}"] = [
+                        pick(image_candidates, slot)
+                        for image_candidates in candidates[key]
+                    ]
+                label = f"{css_width}x{ratio:g}"
+                for variant, sizes in rows.items():
+                    print(
+                        f"{label:<12}{variant:<18}"
+                        f"{sum(sizes) / 1024:>10.1f}"
+                        f"{sum(sizes[:fold]) / 1024:>12.1f}"
+                    )
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Scripted load scenarios against the WSGI app, compared to a baseline.
+
+    python -m benchmarks.bench_load [--scale 0.05] [--save-baseline]
+
+The benchmark seeds a throwaway database with ``seed_data`` and then
+replays a few user journeys through ``yatube.wsgi.application``
+in-process:
+
+* ``anon_index`` - an anonymous visitor reads the first pages of the
+  index, following the "next" links;
+* ``deep_paging`` - jumps to random deep pages, both by ``?page=`` and
+  by cursor;
+* ``follow_feed`` - logged-in readers with many subscriptions open
+  their follow feed and its second page;
+* ``comment_posting`` - a reader opens a post and comments on it.
+
+For every scenario it prints p50/p95/p99 latency and queries per
+request, as the median over ``--rounds`` repetitions. The numbers are
+compared against ``baseline.json`` next to this file, and the run
+exits with status 1 on a regression; ``--save-baseline`` overwrites
+the baseline with the current run. Latency is machine-dependent, so
+refresh the baseline on the machine that runs the comparison; query
+counts are not, and are the stricter signal.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+
+from . import setup_django, test_database
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+NEXT_CURSOR_RE = re.compile(r'href="\?cursor=([\w-]+)">Следующая')
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_avg")
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(responses):
+    latencies = [response.elapsed * 1000 for response in responses]
+    queries = [response.queries for response in responses]
+    errors = sum(response.status_code >= 400 for response in responses)
+    return {
+        "requests": len(responses),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "queries_avg": sum(queries) / len(queries),
+        "queries_max": max(queries),
+    }
+
+
+def combine(summaries):
+    """Sum the counts and take the median of every other metric."""
+    combined = {}
+    for key in summaries[0]:
+        values = [summary[key] for summary in summaries]
+        if key in ("requests", "errors"):
+            combined[key] = sum(values)
+        else:
+            combined[key] = statistics.median(values)
+    return combined
+
+
+def anon_index(client_factory, rng, iterations):
+    from django.core.cache import cache
+
+    responses = []
+    for number in range(iterations):
+        # Every tenth visitor arrives after the page cache was reset.
+        if number % 10 == 0:
+            cache.clear()
+        client = client_factory()
+        path = "/"
+        for _ in range(5):
+            response = client.get(path)
+            responses.append(response)
+            found = NEXT_CURSOR_RE.search(response.text())
+            if found is None:
+                break
+            path = f"/?cursor={found.group(1)}"
+    return responses
+
+
+def deep_paging(client_factory, rng, iterations):
+    from posts.models import Post
+    from posts.utils import CURSOR_NEXT, POSTS_LIMIT, CursorPaginator
+
+    client = client_factory()
+    records = Post.objects.all()
+    paginator = CursorPaginator(records)
+    total = records.count()
+    pages = max(1, total // POSTS_LIMIT)
+    responses = []
+    for _ in range(iterations):
+        page = rng.randint(pages // 2, pages)
+        responses.append(client.get("/", {"page": page}))
+        anchor = records.order_by(*paginator.ordering)[rng.randrange(total)]
+        cursor = paginator.cursor_for(CURSOR_NEXT, anchor)
+        responses.append(client.get("/", {"cursor": cursor}))
+    return responses
+
+
+def busy_readers(limit):
+    from posts.models import User
+
+    return list(
+        User.objects.filter(stats__following_count__gt=0).order_by(
+            "-stats__following_count"
+        )[:limit]
+    )
+
+
+def follow_feed(client_factory, rng, iterations):
+    responses = []
+    readers = busy_readers(20)
+    for _ in range(iterations):
+        client = client_factory()
+        client.login(rng.choice(readers))
+        response = client.get("/follow/")
+        responses.append(response)
+        found = NEXT_CURSOR_RE.search(response.text())
+        if found is not None:
+            responses.append(client.get(f"/follow/?cursor={found.group(1)}"))
+    return responses
+
+
+def comment_posting(client_factory, rng, iterations):
+    from posts.models import Post
+
+    post_ids = list(
+        Post.objects.order_by("-comments_count").values_list("id", flat=True)[
+            :100
+        ]
+    )
+    readers = busy_readers(50)
+    responses = []
+    for _ in range(iterations):
+        client = client_factory()
+        client.login(rng.choice(readers))
+        post_id = rng.choice(post_ids)
+        responses.append(client.get(f"/posts/{post_id}/"))
+        responses.append(
+            client.post(
+                f"/posts/{post_id}/comment/", {"text": "Нагрузочный тест"}
+            )
+        )
+    return responses
+
+
+SCENARIOS = {
+    "anon_index": anon_index,
+    "deep_paging": deep_paging,
+    "follow_feed": follow_feed,
+    "comment_posting": comment_posting,
+}
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Print the deltas; return the names of regressed metrics.
+
+    A metric regresses when it grows by more than ``tolerance`` of the
+    baseline and by more than ``min_delta`` in absolute terms, so that
+    sub-millisecond jitter does not fail the run.
+    """
+    regressions = []
+    print(f"{'scenario':<18}{'metric':<13}{'now':>10}{'base':>10}{'diff':>9}")
+    for name, summary in results.items():
+        base = baseline.get(name)
+        for metric in METRICS:
+            now = summary[metric]
+            if base is None or not base.get(metric):
+                print(f"{name:<18}{metric:<13}{now:>10.2f}{'-':>10}")
+                continue
+            change = now / base[metric] - 1
+            mark = ""
+            if change > tolerance and now - base[metric] > min_delta:
+                mark = " !"
+                regressions.append(f"{name}.{metric}")
+            print(
+                f"{name:<18}{metric:<13}{now:>10.2f}"
+                f"{base[metric]:>10.2f}{change:>+9.0%}{mark}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--scale", type=float, default=0.05)
+    parser.add_argument("--iterations", type=int, default=40)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=3,
+        help="Repeat each scenario and report the median of the rounds.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--scenario", action="append", choices=sorted(SCENARIOS)
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed relative growth of a metric over the baseline.",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=2.0,
+        help="Ignore growth smaller than this many ms (or queries).",
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+
+    from yatube.wsgi import application
+
+    from .wsgi_client import WSGIClient
+
+    with test_database():
+        call_command("seed_data", scale=args.scale, seed=args.seed)
+        results = {}
+        for name in args.scenario or SCENARIOS:
+            scenario = SCENARIOS[name]
+            rng = random.Random(args.seed)
+            # Warm up templates, the URL resolver and the caches so the
+            # first iterations do not skew the percentiles.
+            scenario(lambda: WSGIClient(application), rng, args.warmup)
+            results[name] = combine(
+                [
+                    summarize(
+                        scenario(
+                            lambda: WSGIClient(application),
+                            rng,
+                            args.iterations,
+                        )
+                    )
+                    for _ in range(args.rounds)
+                ]
+            )
+
+    for name, summary in results.items():
+        print(
+            f"{name}: {summary['requests']} requests, "
+            f"{summary['errors']} errors, "
+            f"max {summary['queries_max']} queries"
+        )
+    if args.save_baseline:
+        with open(BASELINE, "w") as baseline_file:
+            rounded = {
+                name: {key: round(value, 3) for key, value in summary.items()}
+                for name, summary in results.items()
+            }
+            json.dump(rounded, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Baseline saved to {BASELINE}")
+        return
+
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print("Regressed: " + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare OFFSET and keyset pagination on a large posts table.
+
+    python -m benchmarks.bench_pagination [--pages 10000]
+
+With OFFSET paging the cost of a page grows with its number (SQLite has
+to walk and discard every skipped row, and ``Paginator`` adds a
+``COUNT(*)``). With the cursor paginator page 1 and page 10,000 run the
+same single indexed range query.
+"""
+
+import argparse
+
+from . import setup_django, test_database, timeit
+
+
+def seed(pages, per_page):
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Post
+
+    author = get_user_model().objects.create_user(username="bench")
+    total = pages * per_page + 1
+    Post.objects.bulk_create(
+        [Post(author=author, text=f"post {n}") for n in range(total)]
+    )
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from posts.models import Post
+    from posts.utils import (
+        CURSOR_NEXT,
+        POSTS_LIMIT,
+        CursorPaginator,
+        paginate,
+    )
+
+    with test_database():
+        total = seed(args.pages, POSTS_LIMIT)
+        records = Post.objects.all()
+        paginator = CursorPaginator(records)
+        anchor = records.order_by(*paginator.ordering)[
+            (args.pages - 1) * POSTS_LIMIT - 1
+        ]
+        deep_cursor = paginator.cursor_for(CURSOR_NEXT, anchor)
+
+        cases = {
+            "offset page 1": lambda: list(paginate(1, records)),
+            f"offset page {args.pages}": lambda: list(
+                paginate(args.pages, records)
+            ),
+            "cursor page 1": lambda: list(paginator.get_page(None)),
+            f"cursor page {args.pages}": lambda: list(
+                paginator.get_page(deep_cursor)
+            ),
+        }
+
+        print(f"{total} posts, {POSTS_LIMIT} per page")
+        print(f"{'case':<24}{'best ms':>10}{'queries':>10}")
+        for name, case in cases.items():
+            with CaptureQueriesContext(connection) as queries:
+                case()
+            elapsed = timeit(case, repeat=args.repeat)
+            print(f"{name:<24}{elapsed:>10.3f}{len(queries):>10}")
+
+
+if __name__ == "__main__":
+    main()
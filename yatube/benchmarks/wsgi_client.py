@@ -0,0 +1,104 @@
+"""A minimal client that calls the WSGI application in-process.
+
+Unlike ``django.test.Client`` it goes through ``yatube.wsgi.application``
+with the full middleware stack, CSRF checks included, so the numbers
+match what a WSGI server would see minus the network.
+"""
+import time
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+
+
+class Response:
+    def __init__(self, status, headers, body, elapsed, queries):
+        self.status_code = int(status.split()[0])
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+        self.queries = queries
+
+    def text(self):
+        return self.body.decode()
+
+
+class WSGIClient:
+    def __init__(self, application):
+        self.application = application
+        self.cookies = SimpleCookie()
+
+    def login(self, user):
+        """Reuse a session created by the test client for ``user``."""
+        from django.test import Client
+
+        client = Client()
+        client.force_login(user)
+        self.cookies.update(client.cookies)
+
+    def _environ(self, method, path, data):
+        url = urlsplit(path)
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": url.path,
+            "QUERY_STRING": url.query,
+            "SERVER_NAME": "testserver",
+            "REMOTE_ADDR": "10.0.0.1",
+        }
+        body = b""
+        if method == "GET" and data:
+            environ["QUERY_STRING"] = urlencode(data)
+        elif data is not None:
+            body = urlencode(data).encode()
+            environ["CONTENT_TYPE"] = "application/x-www-form-urlencoded"
+        environ["CONTENT_LENGTH"] = str(len(body))
+        environ["wsgi.input"] = BytesIO(body)
+        if self.cookies:
+            environ["HTTP_COOKIE"] = "; ".join(
+                f"{name}={morsel.value}"
+                for name, morsel in self.cookies.items()
+            )
+        csrf = self.cookies.get(settings.CSRF_COOKIE_NAME)
+        if csrf is not None:
+            environ["HTTP_X_CSRFTOKEN"] = csrf.value
+        setup_testing_defaults(environ)
+        return environ
+
+    def request(self, method, path, data=None):
+        from core.queries import record_queries
+
+        environ = self._environ(method, path, data)
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured["status"] = status
+            captured["headers"] = headers
+
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            result = self.application(environ, start_response)
+            try:
+                body = b"".join(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        elapsed = time.perf_counter() - started
+
+        for name, value in captured["headers"]:
+            if name.lower() == "set-cookie":
+                self.cookies.load(value)
+        return Response(
+            captured["status"],
+            captured["headers"],
+            body,
+            elapsed,
+            len(recorder),
+        )
+
+    def get(self, path, data=None):
+        return self.request("GET", path, data)
+
+    def post(self, path, data=None):
+        return self.request("POST", path, data or {})
@@ -0,0 +1,142 @@
+"""ASGI-обертка над WSGI-приложением Django.
+
+В Django 2.2 нет ни ASGI, ни асинхронных представлений, поэтому
+yatube/asgi.py оборачивает WSGI-приложение. Соединения обслуживает цикл
+событий ASGI-сервера: тело запроса читается целиком без потока, и лишь
+затем Django выполняется в одном из потоков пула. Медленный клиент
+занимает корутину, а не поток, поэтому соединений на процесс может быть
+намного больше, чем потоков.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+
+# Тело запроса больше этого размера уходит во временный файл.
+BODY_IN_MEMORY = 64 * 1024
+
+
+def build_environ(scope: dict, body) -> dict:
+    """WSGI environ по ASGI scope и уже прочитанному телу."""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "")
+        .encode("utf8")
+        .decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": BytesIO(),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_LENGTH", "CONTENT_TYPE"):
+            name = f"HTTP_{name}"
+        value = raw_value.decode("latin1")
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    return environ
+
+
+class AsgiAdapter:
+    """ASGI-приложение, выполняющее WSGI-приложение в пуле потоков."""
+
+    def __init__(self, wsgi_application, threads: int):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="asgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Неподдерживаемый тип ASGI: {scope['type']}")
+
+        with SpooledTemporaryFile(max_size=BODY_IN_MEMORY) as body:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(
+                self.executor, self.run, loop, scope, body, send
+            )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def run(self, loop, scope: dict, body, send) -> None:
+        """Выполняет запрос в потоке пула и отправляет ответ."""
+
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and start.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            start["message"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                # Django 2.2 отдает Set-Cookie с ведущим пробелом, а
+                # ASGI-серверы строже WSGI-серверов к значениям.
+                "headers": [
+                    (
+                        name.lower().encode("latin1"),
+                        value.strip().encode("latin1"),
+                    )
+                    for name, value in headers
+                ],
+            }
+
+        def send_start():
+            if not start.get("sent"):
+                start["sent"] = True
+                send_sync(start["message"])
+
+        result = self.wsgi_application(
+            build_environ(scope, body), start_response
+        )
+        try:
+            for chunk in result:
+                if chunk:
+                    send_start()
+                    send_sync(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": True,
+                        }
+                    )
+            send_start()
+            send_sync({"type": "http.response.body"})
+        finally:
+            # close() отправляет request_finished: Django закрывает
+            # соединения с базой и завершает запрос.
+            if hasattr(result, "close"):
+                result.close()
@@ -0,0 +1,139 @@
+"""Кэширование с защитой от «стада» перестроений.
+
+get_or_compute хранит значение вместе с мягким сроком годности и
+временем последнего перестроения:
+
+* после мягкого срока запись еще живет STALE_TTL секунд, и пока один
+  процесс ее перестраивает (под блокировкой cache.add), остальные
+  отдают устаревшее значение;
+* незадолго до истечения срока запись с небольшой вероятностью
+  перестраивается заранее (probabilistic early expiration, XFetch),
+  поэтому перестроения не совпадают по времени у всех процессов;
+* счетчики попаданий, промахов, отдачи устаревших данных и времени
+  перестроения копятся в том же кэше и доступны через get_stats.
+"""
+import math
+import random
+import time
+from typing import Any, Callable, Dict, Iterable
+
+from django.core.cache import cache
+
+
+STALE_TTL: int = 60
+LOCK_TIMEOUT: int = 30
+LOCK_WAIT: float = 2.0
+LOCK_POLL: float = 0.05
+EARLY_EXPIRATION_BETA: float = 1.0
+
+STATS_PREFIX: str = "cachestats"
+STATS_NAMES_KEY: str = f"{STATS_PREFIX}:names"
+STATS_EVENTS = ("hits", "misses", "stale", "rebuilds", "rebuild_us")
+
+_registered_names = set()
+
+
+def _register(name: str) -> None:
+    if name in _registered_names:
+        return
+    names = cache.get(STATS_NAMES_KEY, set())
+    if name not in names:
+        cache.set(STATS_NAMES_KEY, names | {name}, None)
+    _registered_names.add(name)
+
+
+def count(name: str, event: str, amount: int = 1) -> None:
+    _register(name)
+    key = f"{STATS_PREFIX}:{name}:{event}"
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, amount)
+
+
+def get_stats(names: Iterable[str] = ()) -> Dict[str, Dict[str, float]]:
+    """Счетчики по именам; без аргументов — по всем известным."""
+    names = sorted(names or cache.get(STATS_NAMES_KEY, set()))
+    keys = {
+        f"{STATS_PREFIX}:{name}:{event}": (name, event)
+        for name in names
+        for event in STATS_EVENTS
+    }
+    values = cache.get_many(keys)
+    stats = {name: dict.fromkeys(STATS_EVENTS, 0) for name in names}
+    for key, value in values.items():
+        name, event = keys[key]
+        stats[name][event] = value
+    for counters in stats.values():
+        rebuilds = counters["rebuilds"]
+        counters["rebuild_ms_avg"] = (
+            counters["rebuild_us"] / rebuilds / 1000 if rebuilds else 0
+        )
+    return stats
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+def acquire_lock(key: str, timeout: int = LOCK_TIMEOUT) -> bool:
+    """Single-flight: только один процесс получает право перестроения."""
+    return cache.add(_lock_key(key), 1, timeout)
+
+
+def release_lock(key: str) -> None:
+    cache.delete(_lock_key(key))
+
+
+def _should_refresh(entry: dict, beta: float) -> bool:
+    jitter = -entry["delta"] * beta * math.log(1.0 - random.random())
+    return time.time() + jitter >= entry["expires"]
+
+
+def _rebuild(key: str, compute: Callable[[], Any], timeout: int, name: str):
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    entry = {"value": value, "expires": time.time() + timeout, "delta": delta}
+    cache.set(key, entry, timeout + STALE_TTL)
+    count(name, "rebuilds")
+    count(name, "rebuild_us", int(delta * 1_000_000))
+    return value
+
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    timeout: int,
+    name: str = "default",
+    beta: float = EARLY_EXPIRATION_BETA,
+) -> Any:
+    """Значение из кэша или результат compute() с защитой от стада."""
+    entry = cache.get(key)
+    if entry is not None and not _should_refresh(entry, beta):
+        count(name, "hits")
+        return entry["value"]
+
+    if acquire_lock(key):
+        count(name, "misses")
+        try:
+            return _rebuild(key, compute, timeout, name)
+        finally:
+            release_lock(key)
+
+    if entry is not None:
+        count(name, "stale")
+        return entry["value"]
+
+    # Значения нет совсем, а его уже строит другой процесс: ждем его
+    # результата, но не дольше LOCK_WAIT, после чего строим сами.
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            count(name, "hits")
+            return entry["value"]
+    count(name, "misses")
+    return _rebuild(key, compute, timeout, name)
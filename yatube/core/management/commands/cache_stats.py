@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import get_stats
+
+
+class Command(BaseCommand):
+    help = "Показывает счетчики попаданий и перестроений кэша."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Имена счетчиков.")
+
+    def handle(self, *args, **options):
+        stats = get_stats(options["names"])
+        if not stats:
+            self.stdout.write("Счетчиков пока нет.")
+            return
+        header = f"{'name':<28}{'hits':>10}{'misses':>10}{'stale':>10}"
+        self.stdout.write(f"{header}{'rebuild ms':>12}")
+        for name, counters in stats.items():
+            self.stdout.write(
+                f"{name:<28}{counters['hits']:>10}{counters['misses']:>10}"
+                f"{counters['stale']:>10}{counters['rebuild_ms_avg']:>12.2f}"
+            )
@@ -0,0 +1,107 @@
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import FOLDED_SUFFIX, TIMINGS_SUFFIX, read_profiles
+
+
+TIME_PARTS = ("sql_ms", "template_ms", "python_ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Сводка по выборочным профилям запросов: время по представлениям "
+        "и самые горячие функции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir", help="Каталог профилей, по умолчанию PROFILE_DIR."
+        )
+        parser.add_argument(
+            "--view", help="Только одно представление, например posts:index."
+        )
+        parser.add_argument(
+            "--top", type=int, default=15, help="Сколько функций показать."
+        )
+        parser.add_argument(
+            "--folded",
+            help="Записать объединенные стеки в файл для flame graph.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Удалить профили после отчета.",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or settings.PROFILE_DIR
+        stacks, timings = read_profiles(directory)
+        view = options["view"]
+        if view:
+            stacks = Counter(
+                {
+                    stack: count
+                    for stack, count in stacks.items()
+                    if stack.split(";", 1)[0] == view
+                }
+            )
+            timings = [row for row in timings if row["view"] == view]
+        if not timings:
+            self.stdout.write("Профилей пока нет.")
+            return
+
+        self.write_views(timings)
+        self.write_functions(stacks, options["top"])
+        if options["folded"]:
+            with open(options["folded"], "w", encoding="utf8") as folded:
+                for stack, count in sorted(stacks.items()):
+                    folded.write(f"{stack} {count}\n")
+        if options["clear"]:
+            for name in os.listdir(directory):
+                if name.endswith((FOLDED_SUFFIX, TIMINGS_SUFFIX)):
+                    os.remove(os.path.join(directory, name))
+
+    def write_views(self, timings):
+        views = defaultdict(list)
+        for row in timings:
+            views[row["view"]].append(row)
+        header = f"{'view':<32}{'requests':>10}{'avg ms':>10}"
+        self.stdout.write(f"{header}{'sql':>8}{'template':>10}{'python':>8}")
+        for name, rows in sorted(
+            views.items(),
+            key=lambda item: -sum(row["wall_ms"] for row in item[1]),
+        ):
+            wall = sum(row["wall_ms"] for row in rows)
+            shares = [
+                sum(row[part] for row in rows) / wall if wall else 0.0
+                for part in TIME_PARTS
+            ]
+            self.stdout.write(
+                f"{name:<32}{len(rows):>10}{wall / len(rows):>10.1f}"
+                f"{shares[0]:>8.0%}{shares[1]:>10.0%}{shares[2]:>8.0%}"
+            )
+
+    def write_functions(self, stacks, top):
+        total = sum(stacks.values())
+        if not total:
+            return
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in stacks.items():
+            # Первый кадр — имя представления, а не функция.
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        self.stdout.write("")
+        self.stdout.write(f"{total} снимков стека")
+        self.stdout.write(f"{'self':>7}{'total':>7}  function")
+        for frame, count in own.most_common(top):
+            self.stdout.write(
+                f"{count / total:>7.1%}{inclusive[frame] / total:>7.1%}"
+                f"  {frame}"
+            )
@@ -0,0 +1,108 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Процессы запускаются через spawn и импортируют этот модуль до
+# django.setup(), поэтому core.tasks импортируется внутри функций.
+
+
+def _run_threads(threads: int, poll_interval: float) -> None:
+    """Запускает потоки-исполнители и ждет SIGINT или SIGTERM."""
+    from core import tasks
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    workers = [
+        threading.Thread(
+            target=tasks.work,
+            args=(stop, poll_interval),
+            name=f"tasks-{number}",
+        )
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    # Главный поток ждет с таймаутом, чтобы успевать обработать сигнал.
+    while not stop.wait(1):
+        pass
+    for worker in workers:
+        worker.join()
+
+
+def _process_main(threads: int, poll_interval: float) -> None:
+    import django
+
+    django.setup()
+    from core import tasks
+
+    tasks.discover()
+    _run_threads(threads, poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Выполняет фоновые задачи из очереди core.tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.TASK_WORKERS,
+            help="Потоков-исполнителей в каждом процессе.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Число процессов; больше одного — для задач, нагружающих "
+            "процессор, например миниатюр.",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=1.0,
+            help="Пауза в секундах, когда очередь пуста.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить готовые задачи и выйти.",
+        )
+
+    def handle(self, *args, **options):
+        from core import tasks
+
+        tasks.discover()
+        if options["once"]:
+            done = tasks.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {done}."))
+            return
+
+        threads, poll = options["threads"], options["poll"]
+        self.stdout.write(
+            f"Исполнителей: {options['processes']} x {threads}. "
+            "Остановка — Ctrl+C."
+        )
+        if options["processes"] == 1:
+            _run_threads(threads, poll)
+            return
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_process_main, args=(threads, poll))
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        while not stop.wait(1):
+            if not any(process.is_alive() for process in processes):
+                break
+        for process in processes:
+            process.terminate()
+            process.join()
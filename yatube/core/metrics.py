@@ -0,0 +1,341 @@
+"""Метрики сайта в текстовом формате Prometheus.
+
+MetricsMiddleware для каждого запроса записывает в гистограмму по имени
+URL (posts:index, users:login, ...) его длительность, а также число и
+время SQL-запросов (через execute_wrapper) и время отрисовки шаблонов.
+Время шаблонов считает бэкенд InstrumentedTemplates, указанный в
+TEMPLATES; в него входят и запросы, выполненные из шаблона.
+
+Каждый процесс копит метрики в памяти. Если задан METRICS_DIR, процесс
+не реже раза в METRICS_FLUSH_INTERVAL секунд сохраняет их в свой файл,
+а страница метрик складывает файлы всех процессов, как multiprocess-
+режим prometheus_client: счетчики завершившихся процессов не теряются,
+поэтому каталог очищают при развертывании. Счетчики кэша берутся из
+core.cache.get_stats, они и так общие для всех процессов.
+"""
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+from .cache import get_stats
+
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Метка для адресов, которые не нашлись в urls.py: без нее каждый
+# случайный путь стал бы отдельной серией.
+UNRESOLVED_VIEW = "unresolved"
+FILE_PREFIX = "metrics-"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Время базы и шаблонов текущего запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+
+def new_view() -> dict:
+    return {
+        "requests": {},
+        "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+        "seconds": 0.0,
+        "queries": 0,
+        "query_seconds": 0.0,
+        "template_seconds": 0.0,
+    }
+
+
+def merge_views(target: Dict[str, dict], source: Dict[str, dict]) -> None:
+    for name, data in source.items():
+        view = target.setdefault(name, new_view())
+        for code, requests in data["requests"].items():
+            view["requests"][code] = view["requests"].get(code, 0) + requests
+        view["buckets"] = [
+            total + count
+            for total, count in zip(view["buckets"], data["buckets"])
+        ]
+        for field in (
+            "seconds",
+            "queries",
+            "query_seconds",
+            "template_seconds",
+        ):
+            view[field] += data[field]
+
+
+class Registry:
+    """Метрики одного процесса."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.file_name = f"{FILE_PREFIX}{self.pid}-{uuid.uuid4().hex[:8]}"
+        self.views: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flushed = time.monotonic()
+
+    def observe(
+        self, name: str, code: int, seconds: float, request: RequestMetrics
+    ) -> None:
+        bucket = len(LATENCY_BUCKETS)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                bucket = index
+                break
+        with self.lock:
+            view = self.views.setdefault(name, new_view())
+            code = str(code)
+            view["requests"][code] = view["requests"].get(code, 0) + 1
+            view["buckets"][bucket] += 1
+            view["seconds"] += seconds
+            view["queries"] += request.queries
+            view["query_seconds"] += request.query_seconds
+            view["template_seconds"] += request.template_seconds
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self.lock:
+            return copy.deepcopy(self.views)
+
+    def flush(self, directory: str, force: bool = False) -> None:
+        """Сохраняет метрики в файл процесса, если пришло время."""
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if not force and time.monotonic() - self.flushed < interval:
+            return
+        # Файл пишет один поток, остальные не ждут его.
+        if not self.flush_lock.acquire(blocking=force):
+            return
+        try:
+            self.flushed = time.monotonic()
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{self.file_name}.json")
+            with open(f"{path}.tmp", "w", encoding="utf8") as file:
+                json.dump(self.snapshot(), file)
+            os.replace(f"{path}.tmp", path)
+        finally:
+            self.flush_lock.release()
+
+
+_registry: Optional[Registry] = None
+_registry_lock = threading.Lock()
+
+
+def registry() -> Registry:
+    """Метрики текущего процесса; после fork у потомка они свои."""
+    global _registry
+    with _registry_lock:
+        if _registry is None or _registry.pid != os.getpid():
+            _registry = Registry()
+        return _registry
+
+
+def collect() -> Dict[str, dict]:
+    """Метрики всех процессов или только текущего без METRICS_DIR."""
+    own = registry()
+    directory = settings.METRICS_DIR
+    if not directory:
+        return own.snapshot()
+    own.flush(directory, force=True)
+    views: Dict[str, dict] = {}
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith(FILE_PREFIX) and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf8") as file:
+                merge_views(views, json.load(file))
+        except (OSError, ValueError):
+            # Файл удалили при очистке каталога.
+            continue
+    return views
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        current = getattr(_local, "current", None)
+        if current is None or current.rendering:
+            # Вложенная отрисовка уже учтена во внешней.
+            return super().render(context, request)
+        current.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            current.rendering = False
+            current.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """Шаблоны Django, замеряющие время отрисовки для метрик."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class MetricsMiddleware:
+    """Записывает метрики каждого запроса; должен стоять первым."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        _local.current = current = RequestMetrics()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(current)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.current = None
+        match = getattr(request, "resolver_match", None)
+        own = registry()
+        own.observe(
+            match.view_name if match else UNRESOLVED_VIEW,
+            response.status_code,
+            time.perf_counter() - started,
+            current,
+        )
+        if settings.METRICS_DIR:
+            own.flush(settings.METRICS_DIR)
+        return response
+
+
+def label(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return '"{}"'.format(escaped.replace('"', '\\"'))
+
+
+def metric_lines(
+    name: str, kind: str, help_text: str, samples: Iterable[tuple]
+) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        labels = ",".join(f"{key}={label(text)}" for key, text in labels)
+        lines.append(f"{name}{suffix}{{{labels}}} {value}")
+    return lines
+
+
+def render_metrics(views: Dict[str, dict], cache_stats: dict) -> str:
+    """Текст в формате Prometheus по метрикам запросов и кэша."""
+    views = sorted(views.items())
+    histogram = []
+    for name, data in views:
+        cumulative = 0
+        bounds = [f"{bound:g}" for bound in LATENCY_BUCKETS] + ["+Inf"]
+        for bound, count in zip(bounds, data["buckets"]):
+            cumulative += count
+            histogram.append(
+                ("_bucket", [("view", name), ("le", bound)], cumulative)
+            )
+        histogram.append(("_sum", [("view", name)], data["seconds"]))
+        histogram.append(("_count", [("view", name)], cumulative))
+
+    def per_view(field):
+        return [("", [("view", name)], data[field]) for name, data in views]
+
+    lines = [
+        *metric_lines(
+            "yatube_http_requests_total",
+            "counter",
+            "Requests handled, by URL name and status code.",
+            (
+                ("", [("view", name), ("code", code)], requests)
+                for name, data in views
+                for code, requests in sorted(data["requests"].items())
+            ),
+        ),
+        *metric_lines(
+            "yatube_http_request_duration_seconds",
+            "histogram",
+            "Request latency by URL name.",
+            histogram,
+        ),
+        *metric_lines(
+            "yatube_db_queries_total",
+            "counter",
+            "SQL queries run by requests, by URL name.",
+            per_view("queries"),
+        ),
+        *metric_lines(
+            "yatube_db_query_seconds_total",
+            "counter",
+            "Time spent in SQL queries, by URL name.",
+            per_view("query_seconds"),
+        ),
+        *metric_lines(
+            "yatube_template_render_seconds_total",
+            "counter",
+            "Time spent rendering templates, by URL name.",
+            per_view("template_seconds"),
+        ),
+        *metric_lines(
+            "yatube_cache_events_total",
+            "counter",
+            "Cache lookups and rebuilds from core.cache counters.",
+            (
+                ("", [("name", name), ("event", event)], counters[event])
+                for name, counters in sorted(cache_stats.items())
+                for event in ("hits", "misses", "stale", "rebuilds")
+            ),
+        ),
+    ]
+    ratios = []
+    for name, counters in sorted(cache_stats.items()):
+        served = counters["hits"] + counters["stale"]
+        lookups = served + counters["misses"]
+        if lookups:
+            ratios.append(("", [("name", name)], served / lookups))
+    lines += metric_lines(
+        "yatube_cache_hit_ratio",
+        "gauge",
+        "Share of cache lookups served without a rebuild.",
+        ratios,
+    )
+    return "\n".join(lines) + "\n"
+
+
+def metrics_response() -> HttpResponse:
+    return HttpResponse(
+        render_metrics(collect(), get_stats()), content_type=CONTENT_TYPE
+    )
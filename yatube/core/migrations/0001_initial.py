@@ -0,0 +1,91 @@
+# Generated by Django 2.2.19 on 2026-10-18 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Task",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=200, verbose_name="Задача"),
+                ),
+                (
+                    "kwargs",
+                    models.TextField(default="{}", verbose_name="Аргументы"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="queued",
+                        max_length=10,
+                        verbose_name="Состояние",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Попыток"
+                    ),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(
+                        verbose_name="Попыток не больше"
+                    ),
+                ),
+                (
+                    "run_at",
+                    models.DateTimeField(verbose_name="Выполнить не раньше"),
+                ),
+                (
+                    "locked_until",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Занята до"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True, verbose_name="Последняя ошибка"
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Создана"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("run_at", "id"),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "run_at", "id"], name="task_status_run_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class Task(models.Model):
+    """Фоновая задача из очереди core.tasks."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField("Задача", max_length=200)
+    kwargs = models.TextField("Аргументы", default="{}")
+    status = models.CharField(
+        "Состояние", max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Попыток не больше")
+    run_at = models.DateTimeField("Выполнить не раньше")
+    locked_until = models.DateTimeField("Занята до", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created = models.DateTimeField("Создана", auto_now_add=True)
+
+    class Meta:
+        ordering = ("run_at", "id")
+        indexes = [
+            models.Index(
+                fields=["status", "run_at", "id"], name="task_status_run_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id}"
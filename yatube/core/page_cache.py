@@ -0,0 +1,287 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Страница кэшируется по пути и параметрам пагинации. Вместе с ней
+сохраняются версии тегов, от которых она зависит (например, «пост 5»
+или «группа 2»). При изменении данных обработчики сигналов вызывают
+bump_tags, версия тега меняется, и все зависящие от него страницы
+перестают совпадать с текущими версиями — без TTL и перебора ключей.
+
+Те же версии служат валидаторами для условных запросов: conditional_page
+помнит набор тегов страницы и отвечает 304 по If-None-Match или
+If-Modified-Since, не выполняя представление.
+"""
+import hashlib
+import time
+import uuid
+from functools import wraps
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import (
+    http_date,
+    parse_http_date_safe,
+    quote_etag,
+    urlencode,
+)
+
+from .cache import acquire_lock, count, release_lock
+
+
+PAGE_CACHE_PREFIX: str = "pagecache"
+PAGE_CACHE_PARAMS = ("page", "cursor")
+PAGE_STATS_NAME: str = "page"
+
+
+def _version_key(tag: str) -> str:
+    return f"{PAGE_CACHE_PREFIX}:tag:{tag}"
+
+
+def _new_version(stamp: float) -> str:
+    # Случайная версия, а не счетчик: после вытеснения ключа из кэша
+    # счетчик начался бы заново и мог совпасть со старой записью.
+    # Метка времени показывает, когда данные тега менялись последний раз.
+    return f"{stamp:.6f}:{uuid.uuid4().hex}"
+
+
+def _changed_at(version: str) -> float:
+    return float(version.split(":", 1)[0])
+
+
+def _settled(versions: Dict[str, str], started: float) -> bool:
+    """Данные тегов не менялись с начала рендеринга.
+
+    Реплика могла отдать состояние до записи, поэтому с репликами
+    изменение должно быть старше еще на REPLICA_MAX_LAG.
+    """
+    if settings.REPLICA_DATABASES:
+        started -= settings.REPLICA_MAX_LAG
+    return all(_changed_at(version) < started for version in versions.values())
+
+
+def bump_tags(*tags: str) -> None:
+    """Делает недействительными все страницы, зависящие от tags."""
+    if tags:
+        stamp = time.time()
+        cache.set_many(
+            {_version_key(tag): _new_version(stamp) for tag in tags}, None
+        )
+
+
+def current_versions(tags: Iterable[str]) -> Dict[str, str]:
+    keys = {_version_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = {key: _new_version(0) for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def tag_response(response: HttpResponse, *tags: str) -> HttpResponse:
+    """Отмечает ответ тегами данных, из которых он собран."""
+    response.cache_tags = set(getattr(response, "cache_tags", ())) | set(tags)
+    return response
+
+
+def page_key(request: HttpRequest) -> str:
+    params = [
+        (name, request.GET[name])
+        for name in PAGE_CACHE_PARAMS
+        if name in request.GET
+    ]
+    raw = f"{request.path}?{urlencode(params)}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"{PAGE_CACHE_PREFIX}:page:{digest}"
+
+
+def is_tag_cached(request: HttpRequest) -> bool:
+    """Ответ на запрос будет сохранен в кэш страниц по тегам."""
+    return getattr(request, "_tag_cached", False)
+
+
+def _cached_response(entry: dict) -> HttpResponse:
+    response = HttpResponse(
+        entry["content"], content_type=entry["content_type"]
+    )
+    # Версии, с которыми страница собрана: устаревшей копии нельзя
+    # выдавать валидатор текущих данных.
+    response.cache_versions = entry["tags"]
+    return tag_response(response, *entry["tags"])
+
+
+def _store(key: str, response: HttpResponse, started: float) -> None:
+    tags = getattr(response, "cache_tags", None)
+    if response.status_code != 200 or not tags or response.streaming:
+        return
+    versions = current_versions(tags)
+    # Данные поменялись, пока страница собиралась: ответ мог
+    # прочитать старое состояние, сохранять его нельзя.
+    if not _settled(versions, started):
+        return
+    entry = {
+        "content": response.content,
+        "content_type": response["Content-Type"],
+        "tags": versions,
+    }
+    cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+    count(PAGE_STATS_NAME, "rebuilds")
+    count(
+        PAGE_STATS_NAME,
+        "rebuild_us",
+        int((time.time() - started) * 1_000_000),
+    )
+
+
+def cache_anonymous_page(view):
+    """Кэширует ответ view для анонимных GET-запросов.
+
+    Кэшируются только ответы 200, отмеченные tag_response: без тегов
+    страницу нельзя было бы точно инвалидировать.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if (
+            request.method not in ("GET", "HEAD")
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None and (
+            current_versions(entry["tags"]) == entry["tags"]
+        ):
+            count(PAGE_STATS_NAME, "hits")
+            return _cached_response(entry)
+
+        locked = acquire_lock(key)
+        if not locked and entry is not None:
+            # Страницу уже перестраивает другой процесс: пока он не
+            # закончил, отдаем предыдущую версию.
+            count(PAGE_STATS_NAME, "stale")
+            return _cached_response(entry)
+
+        count(PAGE_STATS_NAME, "misses")
+        request._tag_cached = True
+        try:
+            started = time.time()
+            response = view(request, *args, **kwargs)
+            _store(key, response, started)
+        finally:
+            if locked:
+                release_lock(key)
+        return response
+
+    return wrapper
+
+
+def _tags_key(request: HttpRequest) -> str:
+    # Набор тегов может зависеть от пользователя (лента подписок).
+    return f"{page_key(request)}:tags:{request.user.pk}"
+
+
+def _validators(
+    request: HttpRequest,
+    versions: Dict[str, str],
+    modified: Optional[float] = None,
+):
+    """Слабый ETag и Last-Modified страницы для этого посетителя.
+
+    В ETag входят пользователь и CSRF-cookie: разметка страницы
+    зависит от них, а не только от данных. modified — время изменения,
+    которое сообщило само представление; оно заменяет неизвестные
+    метки тегов, заведенных после очистки кэша.
+    """
+    visitor = "{}:{}".format(
+        request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    )
+    raw = visitor + "".join(
+        f"|{tag}={version}" for tag, version in sorted(versions.items())
+    )
+    etag = "W/" + quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    stamps = [_changed_at(version) for version in versions.values()]
+    if modified is not None:
+        stamps.append(modified)
+    elif not all(stamps):
+        return etag, None
+    return etag, int(max(stamps))
+
+
+def _patch_cache_headers(request: HttpRequest, response: HttpResponse):
+    patch_vary_headers(response, ("Cookie",))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=0,
+            s_maxage=settings.PAGE_PROXY_MAX_AGE,
+        )
+
+
+def conditional_page(view):
+    """Условный GET по версиям тегов страницы.
+
+    После первого ответа, отмеченного tag_response, набор его тегов
+    запоминается. Следующий запрос сравнивает If-None-Match или
+    If-Modified-Since с текущими версиями этих тегов и при совпадении
+    получает 304, не затрагивая базу и шаблоны. Заголовок Last-Modified,
+    выставленный представлением, запоминается вместе с тегами.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+
+        key = _tags_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            etag, last_modified = _validators(
+                request, current_versions(entry["tags"]), entry["modified"]
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                _patch_cache_headers(request, response)
+                return response
+
+        started = time.time()
+        response = view(request, *args, **kwargs)
+        tags = getattr(response, "cache_tags", None)
+        if response.status_code == 200 and tags:
+            modified = parse_http_date_safe(response.get("Last-Modified", ""))
+            entry = {"tags": sorted(tags), "modified": modified}
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+            versions = getattr(response, "cache_versions", None)
+            if versions is None:
+                versions = current_versions(tags)
+                # Как и в _store: если данные менялись во время
+                # рендеринга, у ответа нет честного валидатора.
+                if not _settled(versions, started):
+                    versions = None
+            if versions is not None:
+                etag, last_modified = _validators(request, versions, modified)
+                response["ETag"] = etag
+                if last_modified:
+                    response["Last-Modified"] = http_date(last_modified)
+                response = get_conditional_response(
+                    request,
+                    etag=etag,
+                    last_modified=last_modified,
+                    response=response,
+                )
+        _patch_cache_headers(request, response)
+        return response
+
+    return wrapper
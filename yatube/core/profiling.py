@@ -0,0 +1,207 @@
+"""Выборочное профилирование запросов в продакшене.
+
+ProfilingMiddleware профилирует долю PROFILE_SAMPLE_RATE запросов к
+представлениям из пространств имен PROFILE_NAMESPACES. Профилировщик
+статистический: отдельный поток раз в PROFILE_INTERVAL секунд снимает
+стек потока, обрабатывающего запрос, поэтому сам запрос почти не
+замедляется, в отличие от cProfile, который перехватывает каждый вызов.
+
+Время запроса делится на SQL (точно, через execute_wrapper), шаблоны
+(по доле снимков стека внутри django.template) и остальной Python.
+Каждый процесс дописывает в PROFILE_DIR два файла: стеки в формате
+collapsed stacks (profile-<pid>.folded, по ним строит flame graph
+flamegraph.pl или speedscope) и разбивку времени по запросам
+(profile-<pid>.jsonl). Сводку по ним печатает команда profile_report.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+
+FOLDED_SUFFIX = ".folded"
+TIMINGS_SUFFIX = ".jsonl"
+SQL_MODULE = "django.db.backends"
+TEMPLATE_MODULE = "django.template"
+
+_write_lock = threading.Lock()
+
+
+def frame_label(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_name}"
+
+
+class Profile:
+    """Снимки стека и время SQL одного запроса."""
+
+    def __init__(self, view_name: str, root):
+        self.view_name = view_name
+        # Кадр middleware: стек ниже него — обработка запроса.
+        self.root = root
+        self.stacks: Counter = Counter()
+        self.sql_seconds = 0.0
+        self.started = time.perf_counter()
+        self.queries = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+
+    def take_sample(self, frame) -> None:
+        labels = []
+        while frame is not None and frame is not self.root:
+            labels.append(frame_label(frame))
+            frame = frame.f_back
+        if frame is not None:
+            labels.append(self.view_name)
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def timings(self) -> dict:
+        wall = time.perf_counter() - self.started
+        samples = sum(self.stacks.values())
+        template = sum(
+            count
+            for stack, count in self.stacks.items()
+            if TEMPLATE_MODULE in stack and SQL_MODULE not in stack
+        )
+        template_seconds = wall * template / samples if samples else 0.0
+        sql_seconds = min(self.sql_seconds, wall)
+        template_seconds = min(template_seconds, wall - sql_seconds)
+        return {
+            "view": self.view_name,
+            "samples": samples,
+            "wall_ms": round(wall * 1000, 3),
+            "sql_ms": round(sql_seconds * 1000, 3),
+            "template_ms": round(template_seconds * 1000, 3),
+            "python_ms": round(
+                (wall - sql_seconds - template_seconds) * 1000, 3
+            ),
+        }
+
+
+class Sampler:
+    """Поток, снимающий стеки профилируемых потоков."""
+
+    def __init__(self):
+        self.profiles: Dict[int, Profile] = {}
+        self.lock = threading.Lock()
+        self.running = False
+
+    def start(self, profile: Profile) -> None:
+        with self.lock:
+            self.profiles[threading.get_ident()] = profile
+            if not self.running:
+                self.running = True
+                threading.Thread(
+                    target=self.run, name="profiler", daemon=True
+                ).start()
+
+    def stop(self) -> None:
+        with self.lock:
+            self.profiles.pop(threading.get_ident(), None)
+
+    def run(self) -> None:
+        while True:
+            time.sleep(settings.PROFILE_INTERVAL)
+            with self.lock:
+                if not self.profiles:
+                    self.running = False
+                    return
+                frames = sys._current_frames()
+                for ident, profile in self.profiles.items():
+                    profile.take_sample(frames.get(ident))
+
+
+sampler = Sampler()
+
+
+def write_profile(profile: Profile, directory: Optional[str] = None) -> None:
+    directory = directory or settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"profile-{os.getpid()}")
+    lines = [f"{stack} {count}\n" for stack, count in profile.stacks.items()]
+    with _write_lock:
+        with open(base + FOLDED_SUFFIX, "a", encoding="utf8") as folded:
+            folded.writelines(lines)
+        with open(base + TIMINGS_SUFFIX, "a", encoding="utf8") as timings:
+            timings.write(json.dumps(profile.timings()) + "\n")
+
+
+def read_profiles(directory: str):
+    """Стеки и разбивка времени из всех файлов каталога."""
+    stacks: Counter = Counter()
+    timings: List[dict] = []
+    if not os.path.isdir(directory):
+        return stacks, timings
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(FOLDED_SUFFIX):
+            with open(path, encoding="utf8") as lines:
+                for line in lines:
+                    stack, _, count = line.rstrip("\n").rpartition(" ")
+                    if stack and count.isdigit():
+                        stacks[stack] += int(count)
+        elif name.endswith(TIMINGS_SUFFIX):
+            with open(path, encoding="utf8") as lines:
+                timings.extend(json.loads(line) for line in lines if line)
+    return stacks, timings
+
+
+class ProfilingMiddleware:
+    """Профилирует случайную долю запросов к выбранным представлениям.
+
+    Стоит в начале MIDDLEWARE, чтобы в профиль попало время остальных
+    middleware. При PROFILE_SAMPLE_RATE = 0 ничего не делает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+        # Кадр и запрос ссылаются друг на друга: ссылку убираем сразу
+        # после ответа, чтобы не ждать циклического сборщика мусора.
+        request._profile_root = sys._getframe()
+        try:
+            return self.get_response(request)
+        finally:
+            profile = getattr(request, "_profile", None)
+            if profile is not None:
+                sampler.stop()
+                profile.root = None
+                profile.queries.close()
+                write_profile(profile)
+                del request._profile
+            del request._profile_root
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        root = getattr(request, "_profile_root", None)
+        match = request.resolver_match
+        if (
+            root is None
+            or match is None
+            or match.namespace not in settings.PROFILE_NAMESPACES
+        ):
+            return None
+        profile = Profile(match.view_name, root)
+        for alias in connections:
+            profile.queries.enter_context(
+                connections[alias].execute_wrapper(profile)
+            )
+        request._profile = profile
+        sampler.start(profile)
+        return None
@@ -0,0 +1,137 @@
+"""Учет SQL-запросов и поиск N+1.
+
+record_queries() подключает execute_wrapper ко всем соединениям и
+собирает текст выполненных запросов. Запросы сравниваются по «форме»:
+без литералов и с любым списком IN (...), поэтому одинаковые запросы
+для разных строк (типичный N+1 из шаблона) складываются вместе.
+
+QueryInspectorMiddleware проверяет каждый запрос к сайту, а
+QueryBudgetMixin дает тестам assertMaxQueries с той же проверкой.
+Управление транзакциями (BEGIN, SAVEPOINT, ...) за повтор не считается.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from .tasks import running_eagerly
+
+
+logger = logging.getLogger(__name__)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)")
+CONTROL_RE = re.compile(
+    r"^\s*(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b", re.IGNORECASE
+)
+
+
+class RepeatedQueriesError(Exception):
+    """Запрос одной формы выполнен слишком много раз."""
+
+
+def query_shape(sql: str) -> str:
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql.replace("%s", "?"))
+    return IN_LIST_RE.sub("IN (...)", sql)
+
+
+class QueryRecorder:
+    """execute_wrapper, запоминающий SQL выполненных запросов.
+
+    С skip_eager_tasks не записывает запросы задач, выполненных прямо
+    из delay: в продакшене их выполняет исполнитель, а не запрос.
+    """
+
+    def __init__(self, skip_eager_tasks: bool = False):
+        self.queries: List[str] = []
+        self.skip_eager_tasks = skip_eager_tasks
+
+    def __call__(self, execute, sql, params, many, context):
+        if not (self.skip_eager_tasks and running_eagerly()):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Формы запросов, выполненных не меньше threshold раз."""
+        shapes = Counter(
+            query_shape(sql)
+            for sql in self.queries
+            if not CONTROL_RE.match(sql)
+        )
+        return {
+            shape: times
+            for shape, times in shapes.items()
+            if times >= threshold
+        }
+
+
+@contextmanager
+def record_queries(
+    using: Optional[str] = None, skip_eager_tasks: bool = False
+) -> Iterator[QueryRecorder]:
+    recorder = QueryRecorder(skip_eager_tasks)
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+def describe_repeated(repeated: Dict[str, int]) -> str:
+    return "\n".join(
+        f"{times} x {shape}" for shape, times in sorted(repeated.items())
+    )
+
+
+class QueryInspectorMiddleware:
+    """Сообщает о повторяющихся запросах за время обработки запроса.
+
+    Порог задает QUERY_REPEAT_THRESHOLD. В режиме DEBUG при
+    QUERY_REPEAT_RAISE вместо записи в лог поднимается
+    RepeatedQueriesError, чтобы N+1 был виден сразу при разработке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries(skip_eager_tasks=True) as recorder:
+            response = self.get_response(request)
+        repeated = recorder.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            message = (
+                f"{request.method} {request.path}: "
+                f"повторяющиеся запросы ({len(recorder)} всего)\n"
+                f"{describe_repeated(repeated)}"
+            )
+            if settings.DEBUG and settings.QUERY_REPEAT_RAISE:
+                raise RepeatedQueriesError(message)
+            logger.warning(message)
+        return response
+
+
+class QueryBudgetMixin:
+    """Проверки числа запросов для TestCase."""
+
+    @contextmanager
+    def assertMaxQueries(self, budget: int, using: Optional[str] = None):
+        """Блок выполняет не больше budget запросов и не содержит N+1."""
+        with record_queries(using) as recorder:
+            yield recorder
+        queries = "\n".join(recorder.queries)
+        self.assertLessEqual(
+            len(recorder),
+            budget,
+            f"{len(recorder)} запросов при бюджете {budget}:\n{queries}",
+        )
+        repeated = recorder.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        self.assertFalse(repeated, describe_repeated(repeated))
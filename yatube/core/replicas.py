@@ -0,0 +1,138 @@
+"""Чтение из реплик базы данных.
+
+ReplicaRouter отправляет чтение в базы из REPLICA_DATABASES, но только
+внутри представлений, отмеченных декоратором replica_reads: команды,
+сигналы и формы по умолчанию работают с основной базой. Запись всегда
+идет в основную базу.
+
+Реплика отстает от основной базы, поэтому после записи
+ReplicaMiddleware ставит посетителю cookie на REPLICA_MAX_LAG секунд.
+Пока она жива, его запросы читают основную базу, и пользователь сразу
+видит свой пост или комментарий.
+
+Таблица DatabaseCache живет в базе CACHE_DATABASE: в продакшене это
+отдельный файл SQLite, чтобы запись в кэш не ждала запись постов.
+"""
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpRequest, HttpResponse
+
+
+REPLICA_PIN_COOKIE: str = "primary_db"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# app_label модели таблицы DatabaseCache.
+CACHE_APP_LABEL = "django_cache"
+
+_local = threading.local()
+
+
+class RequestState:
+    """Что известно о работе текущего запроса с базами."""
+
+    def __init__(self, pinned: bool):
+        # Читать только основную базу: была запись или жива cookie.
+        self.pinned = pinned
+        self.replica_reads = False
+        self.wrote = False
+
+
+def current_state():
+    return getattr(_local, "state", None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current_state()
+        if model._meta.app_label == CACHE_APP_LABEL:
+            # Кэш не реплицируется: блокировки и версии тегов должны
+            # читаться там же, где пишутся.
+            return settings.CACHE_DATABASE
+        if (
+            state is None
+            or state.pinned
+            or not state.replica_reads
+            or not settings.REPLICA_DATABASES
+        ):
+            return None
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            # Запись в кэш не меняет данные сайта и не привязывает
+            # посетителя к основной базе.
+            return settings.CACHE_DATABASE
+        state = current_state()
+        if state is None:
+            # Вне запроса база выбирается как обычно, в том числе
+            # явным using в командах и миграциях.
+            return None
+        # Все следующие чтения запроса должны видеть эту запись.
+        state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает в реплики вместе с данными при репликации.
+        if db in settings.REPLICA_DATABASES:
+            return False
+        if settings.CACHE_DATABASE != DEFAULT_DB_ALIAS:
+            # В отдельной базе кэша нет ничего, кроме его таблицы.
+            if app_label == CACHE_APP_LABEL:
+                return db == settings.CACHE_DATABASE
+            if db == settings.CACHE_DATABASE:
+                return False
+        return None
+
+
+def replica_reads(view):
+    """Разрешает представлению читать из реплик."""
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        state = current_state()
+        if state is None:
+            return view(request, *args, **kwargs)
+        state.replica_reads = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.replica_reads = False
+
+    return wrapper
+
+
+class ReplicaMiddleware:
+    """Привязывает посетителя к основной базе после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        _local.state = state = RequestState(
+            pinned=(
+                request.method not in SAFE_METHODS
+                or REPLICA_PIN_COOKIE in request.COOKIES
+            )
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.state = None
+        if state.wrote and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_MAX_LAG,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,11 @@
+"""Настройка соединений SQLite через PRAGMA из SQLITE_PRAGMAS."""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: применяет PRAGMA к соединению."""
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
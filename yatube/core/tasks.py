@@ -0,0 +1,204 @@
+"""Очередь фоновых задач в таблице базы данных.
+
+Задача — функция, отмеченная декоратором task. Вызов func.delay(**kwargs)
+записывает строку в core.models.Task в той же транзакции, что и данные:
+после отката не останется задачи, после коммита — задача не потеряется.
+Брокер не нужен, задачи выполняет команда run_workers.
+
+Исполнитель забирает задачу условным UPDATE, поэтому несколько потоков
+и процессов не выполнят одну задачу дважды, и это работает без
+SELECT ... FOR UPDATE. Упавшая задача повторяется с растущей паузой,
+после max_attempts попыток остается в таблице со статусом failed.
+Задачу упавшего исполнителя другие подхватывают по истечении
+TASK_LEASE, пока у нее остаются попытки: задача, которая роняет сам
+исполнитель, после max_attempts аренд помечается failed. Исполнитель,
+чья аренда истекла, не удаляет и не меняет задачу, которую уже забрал
+другой.
+
+С настройкой TASKS_EAGER задачи выполняются сразу при вызове delay —
+для разработки без запущенных исполнителей и для тестов.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+TASK_MAX_ATTEMPTS: int = 3
+# Пауза перед повтором: TASK_RETRY_DELAY * 2 ** (попытка - 1) секунд.
+TASK_RETRY_DELAY: int = 10
+TASK_LEASE = timedelta(minutes=5)
+# Сколько кандидатов читать за раз: пока один поток забирает задачу,
+# остальные успевают забрать соседние.
+CLAIM_BATCH: int = 10
+# Как часто исполнители ищут задачи, чья аренда истекла без попыток.
+ABANDONED_CHECK_INTERVAL: float = 60.0
+
+_registry: Dict[str, Callable] = {}
+_local = threading.local()
+_abandoned_lock = threading.Lock()
+_abandoned_checked: Optional[float] = None
+
+
+def task(
+    func: Optional[Callable] = None, *, max_attempts: int = TASK_MAX_ATTEMPTS
+):
+    """Регистрирует функцию как фоновую задачу и добавляет ей delay."""
+    if func is None:
+        return partial(task, max_attempts=max_attempts)
+    func.task_name = f"{func.__module__}.{func.__name__}"
+    func.max_attempts = max_attempts
+    func.delay = partial(enqueue, func)
+    _registry[func.task_name] = func
+    return func
+
+
+def enqueue(func: Callable, **kwargs) -> Optional[Task]:
+    """Ставит задачу в очередь; аргументы должны сериализоваться в JSON."""
+    if settings.TASKS_EAGER:
+        _local.eager = True
+        try:
+            func(**kwargs)
+        finally:
+            _local.eager = False
+        return None
+    return Task.objects.create(
+        name=func.task_name,
+        kwargs=json.dumps(kwargs),
+        max_attempts=func.max_attempts,
+        run_at=timezone.now(),
+    )
+
+
+def running_eagerly() -> bool:
+    """Текущий поток выполняет задачу прямо из delay (TASKS_EAGER)."""
+    return getattr(_local, "eager", False)
+
+
+def discover() -> None:
+    """Импортирует модули tasks всех приложений, регистрируя задачи."""
+    autodiscover_modules("tasks")
+
+
+def _claimable(now) -> Q:
+    return Q(status=Task.QUEUED, run_at__lte=now) | Q(
+        status=Task.RUNNING,
+        locked_until__lt=now,
+        attempts__lt=F("max_attempts"),
+    )
+
+
+def fail_abandoned(now) -> int:
+    """Помечает failed задачи с истекшей арендой и без попыток."""
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        locked_until__lt=now,
+        attempts__gte=F("max_attempts"),
+    ).update(
+        status=Task.FAILED,
+        locked_until=None,
+        last_error="Аренда истекла: исполнитель не завершил задачу.",
+    )
+
+
+def check_abandoned() -> None:
+    """fail_abandoned не чаще раза в ABANDONED_CHECK_INTERVAL на процесс.
+
+    Иначе каждый опрос пустой очереди выполнял бы лишний UPDATE.
+    """
+    global _abandoned_checked
+    with _abandoned_lock:
+        checked = time.monotonic()
+        if (
+            _abandoned_checked is not None
+            and checked - _abandoned_checked < ABANDONED_CHECK_INTERVAL
+        ):
+            return
+        _abandoned_checked = checked
+    fail_abandoned(timezone.now())
+
+
+def claim() -> Optional[Task]:
+    """Забирает одну готовую к выполнению задачу или возвращает None."""
+    now = timezone.now()
+    candidates = Task.objects.filter(_claimable(now)).values_list(
+        "id", flat=True
+    )[:CLAIM_BATCH]
+    for task_id in candidates:
+        claimed = Task.objects.filter(_claimable(now), id=task_id).update(
+            status=Task.RUNNING,
+            locked_until=now + TASK_LEASE,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def execute(job: Task) -> bool:
+    """Выполняет задачу: успешная удаляется, упавшая ждет повтора.
+
+    Строка меняется, только пока аренда этого исполнителя не перешла
+    к другому.
+    """
+    claimed = Task.objects.filter(id=job.id, locked_until=job.locked_until)
+    try:
+        func = _registry[job.name]
+        func(**json.loads(job.kwargs))
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Задача %s упала", job)
+        retry = job.attempts < job.max_attempts
+        claimed.update(
+            status=Task.QUEUED if retry else Task.FAILED,
+            run_at=timezone.now()
+            + timedelta(seconds=TASK_RETRY_DELAY * 2 ** (job.attempts - 1)),
+            locked_until=None,
+            last_error=error,
+        )
+        return False
+    claimed.delete()
+    return True
+
+
+def run_pending() -> int:
+    """Выполняет готовые задачи, пока они есть; возвращает их число."""
+    done = 0
+    fail_abandoned(timezone.now())
+    job = claim()
+    while job is not None:
+        execute(job)
+        done += 1
+        job = claim()
+    return done
+
+
+def work(stop: threading.Event, poll_interval: float) -> None:
+    """Цикл исполнителя: выполняет задачи, пока не выставлен stop."""
+    while not stop.is_set():
+        try:
+            check_abandoned()
+            job = claim()
+            if job is not None:
+                execute(job)
+        except Exception:
+            logger.exception("Ошибка исполнителя задач")
+            job = None
+        finally:
+            close_old_connections()
+        if job is None:
+            stop.wait(poll_interval)
@@ -0,0 +1,68 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_or_compute
+from core.page_cache import is_tag_cached
+
+
+register = template.Library()
+
+
+class SWRCacheNode(template.Node):
+    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.expire_time_var = expire_time_var
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        request = context.get("request")
+        if request is not None and is_tag_cached(request):
+            # Фрагмент живет по сроку и не знает о тегах: устаревший,
+            # он попал бы в кэш страниц под свежими версиями тегов.
+            return self.nodelist.render(context)
+        try:
+            expire_time = int(self.expire_time_var.resolve(context))
+        except (template.VariableDoesNotExist, ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                f'"swr_cache" tag got an invalid timeout: '
+                f"{self.expire_time_var.var!r}"
+            )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        cache_key = make_template_fragment_key(self.fragment_name, vary_on)
+        return get_or_compute(
+            cache_key,
+            lambda: self.nodelist.render(context),
+            expire_time,
+            name=f"fragment:{self.fragment_name}",
+        )
+
+
+@register.tag("swr_cache")
+def do_swr_cache(parser, token):
+    """Аналог {% cache %} с защитой от одновременных перестроений.
+
+    Синтаксис тот же::
+
+        {% load swr_cache %}
+        {% swr_cache [expire_time] [fragment_name] [var1] [var2] .. %}
+            ...
+        {% endswr_cache %}
+
+    После истечения срока фрагмент еще STALE_TTL секунд отдается
+    устаревшим, пока его перестраивает один процесс. В страницах,
+    которые сохраняет cache_anonymous_page, фрагмент не кэшируется.
+    """
+    nodelist = parser.parse(("endswr_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"{tokens[0]!r} tag requires at least 2 arguments."
+        )
+    return SWRCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
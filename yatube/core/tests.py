@@ -1,6 +1,60 @@
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import weakref
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.utils import timezone
+from django.urls import resolve
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+
+from . import cache as core_cache
+from . import metrics, tasks
+from .asgi import AsgiAdapter
+from .cache import acquire_lock, get_or_compute, get_stats, release_lock
+from .profiling import (
+    Profile,
+    ProfilingMiddleware,
+    read_profiles,
+    write_profile,
+)
+from .queries import (
+    QueryInspectorMiddleware,
+    RepeatedQueriesError,
+    query_shape,
+)
+from .models import Task
+from .sqlite import configure_sqlite
+
+User = get_user_model()
+
+executed = []
+
+
+@tasks.task
+def remember(value):
+    executed.append(value)
+
+
+@tasks.task(max_attempts=2)
+def explode():
+    raise RuntimeError("сбой")
 
 
 class ViewTestClass(TestCase):
@@ -9,3 +63,434 @@ class ViewTestClass(TestCase):
         response = self.client.get("/nonexist-page/")
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, "core/404.html")
+
+
+class GetOrComputeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f"значение {self.calls}"
+
+    def test_value_is_computed_once_and_counted(self):
+        """Значение строится один раз, счетчики это отражают."""
+        for _ in range(3):
+            value = get_or_compute("key", self.compute, 60, name="test")
+        self.assertEqual(value, "значение 1")
+        stats = get_stats(["test"])["test"]
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["rebuilds"], 1)
+
+    def test_stale_value_is_served_while_rebuilding(self):
+        """Пока другой процесс перестраивает значение, отдается старое."""
+        get_or_compute("key", self.compute, 60, name="test")
+        entry = cache.get("key")
+        entry["expires"] = 0
+        cache.set("key", entry)
+        self.assertTrue(acquire_lock("key"))
+        value = get_or_compute("key", self.compute, 60, name="test")
+        self.assertEqual(value, "значение 1")
+        self.assertEqual(get_stats(["test"])["test"]["stale"], 1)
+        release_lock("key")
+        value = get_or_compute("key", self.compute, 60, name="test")
+        self.assertEqual(value, "значение 2")
+
+    def test_early_expiration_refreshes_before_deadline(self):
+        """При медленном перестроении значение обновляется заранее."""
+        get_or_compute("key", self.compute, 60, name="test")
+        entry = cache.get("key")
+        entry["delta"] = 10**6
+        cache.set("key", entry)
+        value = get_or_compute("key", self.compute, 60, name="test")
+        self.assertEqual(value, "значение 2")
+
+    def test_swr_cache_tag_renders_and_caches_fragment(self):
+        """Тег swr_cache кэширует фрагмент шаблона."""
+        template = Template(
+            "{% load swr_cache %}"
+            "{% swr_cache 60 fragment %}{{ value }}{% endswr_cache %}"
+        )
+        self.assertEqual(template.render(Context({"value": 1})), "1")
+        self.assertEqual(template.render(Context({"value": 2})), "1")
+
+
+class QueryInspectorTest(TestCase):
+    def setUp(self):
+        for number in range(5):
+            User.objects.create_user(username=f"user{number}")
+        self.request = RequestFactory().get("/")
+
+    def n_plus_one_view(self, request):
+        for user_id in User.objects.values_list("id", flat=True):
+            User.objects.get(id=user_id)
+        return HttpResponse()
+
+    def test_query_shape_ignores_literals(self):
+        """Запросы к разным строкам имеют одну форму."""
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21"),
+            query_shape("SELECT * FROM t WHERE id IN (%s) LIMIT 1"),
+        )
+
+    def test_repeated_queries_are_logged(self):
+        """Повторяющиеся запросы попадают в лог."""
+        middleware = QueryInspectorMiddleware(self.n_plus_one_view)
+        with self.assertLogs("core.queries", "WARNING") as logs:
+            middleware(self.request)
+        self.assertIn("5 x SELECT", logs.output[0])
+
+    @override_settings(DEBUG=True)
+    def test_repeated_queries_raise_in_debug(self):
+        """В режиме отладки N+1 превращается в исключение."""
+        middleware = QueryInspectorMiddleware(self.n_plus_one_view)
+        with self.assertRaises(RepeatedQueriesError):
+            middleware(self.request)
+
+    @override_settings(DEBUG=True, TASKS_EAGER=True)
+    def test_transactions_and_eager_tasks_are_not_repeats(self):
+        """Точки сохранения и задачи из delay не считаются за N+1."""
+
+        def view(request):
+            for _ in range(5):
+                with transaction.atomic():
+                    pass
+            n_plus_one.delay()
+            return HttpResponse()
+
+        @tasks.task
+        def n_plus_one():
+            self.n_plus_one_view(self.request)
+
+        QueryInspectorMiddleware(view)(self.request)
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_sampled_views_are_written(self):
+        """Профилируются только представления из PROFILE_NAMESPACES."""
+        with self.settings(PROFILE_SAMPLE_RATE=1, PROFILE_DIR=self.directory):
+            self.client.get("/")
+            self.client.get("/api/v1/posts/")
+        stacks, timings = read_profiles(self.directory)
+        self.assertEqual([row["view"] for row in timings], ["posts:index"])
+        row = timings[0]
+        self.assertAlmostEqual(
+            row["sql_ms"] + row["template_ms"] + row["python_ms"],
+            row["wall_ms"],
+            delta=0.01,
+        )
+        self.assertTrue(
+            all(stack.startswith("posts:index;") for stack in stacks)
+        )
+
+    def test_profiled_request_is_freed_without_gc(self):
+        """Профиль не держит запрос в цикле ссылок."""
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            return HttpResponse()
+
+        middleware = ProfilingMiddleware(view)
+        request = RequestFactory().get("/")
+        request.resolver_match = resolve("/")
+        reference = weakref.ref(request)
+        gc.disable()
+        try:
+            with self.settings(
+                PROFILE_SAMPLE_RATE=1, PROFILE_DIR=self.directory
+            ):
+                middleware(request)
+            del request
+            self.assertIsNone(reference())
+        finally:
+            gc.enable()
+        _, timings = read_profiles(self.directory)
+        self.assertEqual(len(timings), 1)
+
+    def test_zero_rate_writes_nothing(self):
+        """При нулевой доле профили не пишутся."""
+        with self.settings(PROFILE_SAMPLE_RATE=0, PROFILE_DIR=self.directory):
+            self.client.get("/")
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_report_aggregates_stacks(self):
+        """Отчет складывает стеки и считает долю функций."""
+
+        def handler(profile):
+            profile.take_sample(sys._getframe())
+
+        profile = Profile("posts:index", sys._getframe())
+        handler(profile)
+        handler(profile)
+        profile.stacks["posts:index;core.tests.render"] += 2
+        write_profile(profile, self.directory)
+
+        out = StringIO()
+        call_command("profile_report", dir=self.directory, stdout=out)
+        report = out.getvalue()
+        self.assertIn("posts:index", report)
+        self.assertIn("4 снимков стека", report)
+        self.assertIn("50.0%  50.0%  core.tests.handler", report)
+
+        folded = os.path.join(self.directory, "all.folded.txt")
+        call_command(
+            "profile_report",
+            dir=self.directory,
+            folded=folded,
+            clear=True,
+            stdout=StringIO(),
+        )
+        with open(folded, encoding="utf8") as lines:
+            self.assertIn(
+                "posts:index;core.tests.handler 2\n", lines.readlines()
+            )
+        self.assertEqual(os.listdir(self.directory), ["all.folded.txt"])
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        metrics._registry = None
+        cache.clear()
+        # Имена счетчиков кэша процесс запоминает, а из кэша они стерты.
+        core_cache._registered_names.clear()
+
+    def metric(self, text, line_start):
+        for line in text.splitlines():
+            if line.startswith(line_start):
+                return float(line.rsplit(" ", 1)[1])
+        self.fail(f"{line_start} нет в метриках")
+
+    def test_request_metrics(self):
+        """Страница метрик показывает задержку, запросы и кэш."""
+        self.client.get("/")
+        self.client.get("/")
+        self.client.get("/nonexist-page/")
+        text = self.client.get("/metrics/").content.decode()
+
+        self.assertEqual(
+            self.metric(
+                text,
+                'yatube_http_requests_total{view="posts:index",code="200"}',
+            ),
+            2,
+        )
+        self.assertEqual(
+            self.metric(
+                text,
+                "yatube_http_request_duration_seconds_bucket"
+                '{view="posts:index",le="+Inf"}',
+            ),
+            2,
+        )
+        self.assertIn(
+            'yatube_http_requests_total{view="unresolved",code="404"} 1',
+            text,
+        )
+        self.assertGreater(
+            self.metric(text, 'yatube_db_queries_total{view="posts:index"}'),
+            0,
+        )
+        self.assertGreater(
+            self.metric(
+                text,
+                'yatube_template_render_seconds_total{view="posts:index"}',
+            ),
+            0,
+        )
+        # Вторая анонимная страница взята из кэша страниц.
+        self.assertEqual(
+            self.metric(text, 'yatube_cache_hit_ratio{name="page"}'), 0.5
+        )
+
+    def test_metrics_only_for_local_addresses(self):
+        """Снаружи страница метрик не видна."""
+        response = self.client.get("/metrics/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token_is_required(self):
+        """С токеном локального адреса недостаточно."""
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.get(
+            "/metrics/",
+            REMOTE_ADDR="10.0.0.1",
+            HTTP_AUTHORIZATION="Bearer secret",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_processes_are_summed(self):
+        """С METRICS_DIR складываются метрики всех процессов."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other = metrics.new_view()
+        other["requests"] = {"200": 3}
+        other["buckets"][0] = 3
+        other["queries"] = 6
+        path = os.path.join(directory.name, "metrics-1-worker.json")
+        with open(path, "w", encoding="utf8") as file:
+            json.dump({"posts:index": other}, file)
+
+        with self.settings(METRICS_DIR=directory.name):
+            self.client.get("/")
+            text = self.client.get("/metrics/").content.decode()
+        self.assertEqual(
+            self.metric(
+                text,
+                'yatube_http_requests_total{view="posts:index",code="200"}',
+            ),
+            4,
+        )
+        self.assertEqual(len(os.listdir(directory.name)), 2)
+
+
+class SqlitePragmasTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={"cache_size": -1234})
+    def test_pragmas_are_applied_to_new_connections(self):
+        """PRAGMA из настроек применяются к соединению."""
+        configure_sqlite(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -1234)
+
+
+class ClosingBody(list):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class AsgiAdapterTest(SimpleTestCase):
+    def wsgi_app(self, environ, start_response):
+        self.environ = environ
+        start_response("201 Created", [("Content-Type", "text/plain")])
+        self.body = ClosingBody([b"got ", environ["wsgi.input"].read()])
+        return self.body
+
+    def test_body_is_read_before_the_app_runs(self):
+        """Тело читается целиком, ответ уходит, итератор закрывается."""
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/путь/",
+            "query_string": b"a=1",
+            "http_version": "1.1",
+            "headers": [(b"content-type", b"text/plain"), (b"x-test", b"1")],
+        }
+        incoming = [
+            {"type": "http.request", "body": b"ab", "more_body": True},
+            {"type": "http.request", "body": b"c"},
+        ]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        adapter = AsgiAdapter(self.wsgi_app, threads=1)
+        asyncio.run(adapter(scope, receive, send))
+
+        self.assertEqual(sent[0]["status"], 201)
+        body = b"".join(message.get("body", b"") for message in sent[1:])
+        self.assertEqual(body, b"got abc")
+        self.assertTrue(self.body.closed)
+        self.assertEqual(self.environ["CONTENT_TYPE"], "text/plain")
+        self.assertEqual(self.environ["HTTP_X_TEST"], "1")
+        self.assertEqual(self.environ["QUERY_STRING"], "a=1")
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        executed.clear()
+
+    def test_delayed_task_runs_in_worker(self):
+        """delay записывает задачу, исполнитель выполняет и удаляет ее."""
+        remember.delay(value=1)
+        self.assertEqual(executed, [])
+        out = StringIO()
+        call_command("run_workers", once=True, stdout=out)
+        self.assertEqual(executed, [1])
+        self.assertIn("1", out.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        remember.delay(value=2)
+        self.assertEqual(executed, [2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_task_is_claimed_once(self):
+        """Забранную задачу не получит другой исполнитель."""
+        remember.delay(value=3)
+        self.assertIsNotNone(tasks.claim())
+        self.assertIsNone(tasks.claim())
+
+    def test_abandoned_task_is_claimed_again(self):
+        """Задачу упавшего исполнителя забирают после истечения срока."""
+        remember.delay(value=4)
+        tasks.claim()
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(executed, [4])
+
+    def test_task_that_kills_workers_fails_after_max_attempts(self):
+        """Истекшая аренда без оставшихся попыток не забирается снова."""
+        explode.delay()
+        tasks.claim()
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        tasks.claim()
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertIsNone(tasks.claim())
+        tasks.fail_abandoned(timezone.now())
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_abandoned_tasks_are_checked_on_an_interval(self):
+        """Поиск брошенных задач не повторяется при каждом опросе."""
+        self.addCleanup(setattr, tasks, "_abandoned_checked", None)
+        tasks._abandoned_checked = None
+        with self.assertNumQueries(1):
+            tasks.check_abandoned()
+        with self.assertNumQueries(0):
+            tasks.check_abandoned()
+
+    def test_expired_lease_does_not_touch_new_claim(self):
+        """Исполнитель с истекшей арендой не удаляет чужую задачу."""
+        remember.delay(value=5)
+        first = tasks.claim()
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        second = tasks.claim()
+        self.assertTrue(tasks.execute(first))
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.RUNNING)
+        self.assertEqual(job.locked_until, second.locked_until)
+        tasks.execute(second)
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_then_kept(self):
+        """Упавшая задача повторяется, а после всех попыток остается."""
+        explode.delay()
+        self.assertEqual(tasks.run_pending(), 1)
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+
+        Task.objects.update(run_at=timezone.now())
+        tasks.run_pending()
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn("сбой", job.last_error)
+        self.assertEqual(tasks.run_pending(), 0)
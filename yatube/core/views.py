@@ -1,4 +1,10 @@
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+from .metrics import metrics_response
 
 
 def page_not_found(request, exception):
@@ -15,3 +21,25 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, "core/403.html", status=403)
+
+
+@never_cache
+def metrics(request):
+    """Метрики для Prometheus.
+
+    С METRICS_TOKEN нужен заголовок Authorization: Bearer <токен>, без
+    него — адрес из METRICS_ALLOWED_IPS. За прокси на том же хосте все
+    запросы приходят с 127.0.0.1, поэтому там нужен токен.
+    """
+    if settings.METRICS_TOKEN:
+        allowed = constant_time_compare(
+            request.META.get("HTTP_AUTHORIZATION", ""),
+            f"Bearer {settings.METRICS_TOKEN}",
+        )
+    else:
+        allowed = (
+            request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+        )
+    if not allowed:
+        raise Http404
+    return metrics_response()
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Post, Group, Comment, Follow
 
 
@@ -10,6 +11,13 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ("group",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту через полнотекстовый индекс вместо LIKE."""
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        records, _ = search.search_posts(search_term)
+        return queryset.filter(id__in=records.values("id")), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
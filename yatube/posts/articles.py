@@ -0,0 +1,58 @@
+"""Кэш отрендеренных постов для списков.
+
+Один и тот же пост выводится на главной, в группе, в профиле и в ленте
+подписок. HTML поста (posts/article.html) кэшируется отдельно, а
+страница списка собирает посты одним get_many и рендерит только
+промахи.
+
+Ключ включает дату изменения поста и все данные автора, которые
+выводятся в шаблоне: правка поста, новая миниатюра или смена имени
+автора дают новый ключ, а старая запись просто истекает.
+"""
+import hashlib
+from typing import Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString, mark_safe
+
+from core.cache import count
+
+from .models import Post
+
+
+ARTICLE_TEMPLATE = "posts/article.html"
+ARTICLE_TIMEOUT: int = 24 * 60 * 60
+ARTICLE_STATS_NAME: str = "article"
+
+
+def article_key(post: Post) -> str:
+    version = "\n".join(
+        (
+            post.updated.isoformat(),
+            post.author.username,
+            post.author.get_full_name(),
+        )
+    )
+    digest = hashlib.md5(version.encode()).hexdigest()
+    return f"article:{post.id}:{digest}"
+
+
+def render_articles(posts: Iterable[Post]) -> List[Tuple[Post, SafeString]]:
+    """Пары (пост, его HTML) в порядке posts."""
+    keys = [(article_key(post), post) for post in posts]
+    found = cache.get_many([key for key, _ in keys])
+    missing = {
+        key: render_to_string(ARTICLE_TEMPLATE, {"post": post})
+        for key, post in keys
+        if key not in found
+    }
+    if missing:
+        cache.set_many(missing, ARTICLE_TIMEOUT)
+        found.update(missing)
+    hits = len(keys) - len(missing)
+    if hits:
+        count(ARTICLE_STATS_NAME, "hits", hits)
+    if missing:
+        count(ARTICLE_STATS_NAME, "misses", len(missing))
+    return [(post, mark_safe(found[key])) for key, post in keys]
@@ -0,0 +1,46 @@
+"""Теги кэша страниц для данных приложения posts.
+
+Страницы отмечаются тегами в представлениях, а обработчики сигналов
+из posts.signals сбрасывают версии тех же тегов при изменении данных.
+"""
+from typing import Iterable, Set
+
+from core.page_cache import bump_tags
+
+
+POSTS_TAG: str = "posts"
+
+
+def post_tag(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def comments_tag(post_id: int) -> str:
+    """Комментарии к посту: страница поста от них не зависит."""
+    return f"comments:{post_id}"
+
+
+def author_tag(author_id: int) -> str:
+    return f"author:{author_id}"
+
+
+def group_tag(group_id: int) -> str:
+    return f"group:{group_id}"
+
+
+def follows_tag(user_id: int) -> str:
+    """Список подписок пользователя."""
+    return f"follows:{user_id}"
+
+
+def listing_tags(posts: Iterable) -> Set[str]:
+    """Теги групп, ссылки на которые выводятся в списке постов."""
+    return {group_tag(post.group_id) for post in posts if post.group_id}
+
+
+def invalidate_post(post, old_group_id=None) -> None:
+    tags = {POSTS_TAG, post_tag(post.id), author_tag(post.author_id)}
+    for group_id in (post.group_id, old_group_id):
+        if group_id:
+            tags.add(group_tag(group_id))
+    bump_tags(*tags)
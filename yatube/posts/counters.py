@@ -0,0 +1,102 @@
+"""Денормализованные счетчики постов, комментариев и подписок.
+
+Счетчики меняются атомарно через F-выражения в обработчиках сигналов
+(posts.signals), поэтому страницы читают готовые значения вместо
+COUNT(*). Если значения разошлись с данными, их пересчитывает команда
+recount_stats.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+# Поле AuthorStats -> (модель, поле со ссылкой на пользователя).
+AUTHOR_COUNTERS = {
+    "posts_count": (Post, "author"),
+    "comments_count": (Comment, "author"),
+    "followers_count": (Follow, "author"),
+    "following_count": (Follow, "user"),
+}
+
+
+def count_subquery(model, field: str, outer: str = "pk"):
+    """Подзапрос COUNT(*) по связанной модели для UPDATE/annotate."""
+    counted = (
+        model.objects.filter(**{field: OuterRef(outer)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counted), Value(0))
+
+
+def bump_author(user_id: int, field: str, delta: int) -> None:
+    """Атомарно изменяет счетчик field пользователя на delta."""
+    stats = AuthorStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f"{field}__gte": -delta})
+    if stats.update(**{field: F(field) + delta}) or delta < 0:
+        return
+    recount_author(user_id)
+
+
+def bump_post_comments(post_id: int, delta: int) -> None:
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F("comments_count") + delta)
+
+
+def recount_author(user_id: int) -> AuthorStats:
+    """Создает или исправляет строку счетчиков по реальным данным."""
+    defaults = {
+        field: model.objects.filter(**{f"{link}_id": user_id}).count()
+        for field, (model, link) in AUTHOR_COUNTERS.items()
+    }
+    stats, _ = AuthorStats.objects.update_or_create(
+        user_id=user_id, defaults=defaults
+    )
+    return stats
+
+
+def get_author_stats(user: User) -> AuthorStats:
+    """Счетчики пользователя; без строки в базе — нулевые значения."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=user)
+
+
+def recount_all() -> dict:
+    """Пересчитывает все счетчики, возвращает число исправленных строк."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        "pk", flat=True
+    )
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=user_id) for user_id in missing],
+        ignore_conflicts=True,
+    )
+
+    drift = {}
+    actual = {
+        field: count_subquery(model, link, outer="user_id")
+        for field, (model, link) in AUTHOR_COUNTERS.items()
+    }
+    for field, expression in actual.items():
+        drift[f"AuthorStats.{field}"] = (
+            AuthorStats.objects.annotate(actual=expression)
+            .exclude(**{field: F("actual")})
+            .count()
+        )
+    AuthorStats.objects.update(**actual)
+
+    comments = count_subquery(Comment, "post")
+    drift["Post.comments_count"] = (
+        Post.objects.annotate(actual=comments)
+        .exclude(comments_count=F("actual"))
+        .count()
+    )
+    Post.objects.update(comments_count=comments)
+    return drift
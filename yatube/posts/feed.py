@@ -0,0 +1,142 @@
+"""Материализованная лента подписок.
+
+Новый пост автора сразу раскладывается по лентам его подписчиков
+(fan-out-on-write), поэтому страница подписок читает один диапазон
+индекса FeedEntry(user, -pub_date). У авторов с числом подписчиков
+больше FEED_FANOUT_LIMIT посты не раскладываются: их ленты дочитываются
+при запросе (fan-out-on-read) и сливаются с материализованной частью.
+"""
+
+from operator import attrgetter
+from typing import List
+
+from django.conf import settings
+from django.db import connection
+
+from .models import AuthorStats, FeedEntry, Follow, Post, User
+from .utils import (
+    POSTS_LIMIT,
+    CursorPaginator,
+    MergedCursorPaginator,
+)
+
+FEED_ORDERING = ("-pub_date", "-post_id")
+
+
+def is_fanned_out(author_id: int) -> bool:
+    """Раскладываются ли посты автора по лентам при записи."""
+    return not AuthorStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out_post(post: Post) -> None:
+    if not is_fanned_out(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=user_id,
+                post_id=post.id,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in followers
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id: int, author_id: int) -> None:
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    if not is_fanned_out(author_id):
+        return
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by("-pub_date", "-id")
+        .values_list("id", "pub_date")[: settings.FEED_BACKFILL_LIMIT]
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def trim(user_id: int, author_id: int) -> None:
+    """Убирает из ленты посты автора после отписки."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild() -> None:
+    """Заново раскладывает ленты всех подписчиков одним запросом.
+
+    Нужна после массовой загрузки данных в обход сигналов: каждая
+    подписка получает последние FEED_BACKFILL_LIMIT постов автора, как
+    при backfill(). Счетчики подписчиков должны быть уже пересчитаны.
+    """
+    FeedEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {FeedEntry._meta.db_table}
+                (user_id, post_id, author_id, pub_date)
+            SELECT follow.user_id, post.id, post.author_id, post.pub_date
+            FROM (
+                SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+                    PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+                ) AS position
+                FROM {Post._meta.db_table}
+            ) AS post
+            JOIN {Follow._meta.db_table} AS follow
+                ON follow.author_id = post.author_id
+            LEFT JOIN {AuthorStats._meta.db_table} AS stats
+                ON stats.user_id = post.author_id
+            WHERE post.position <= %s
+                AND COALESCE(stats.followers_count, 0) <= %s
+            """,
+            [settings.FEED_BACKFILL_LIMIT, settings.FEED_FANOUT_LIMIT],
+        )
+
+
+def read_time_authors(user: User) -> List[int]:
+    """Авторы из подписок, чьи посты читаются при запросе."""
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__followers_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list("author_id", flat=True)
+    )
+
+
+def feed_paginator(user: User, per_page: int = POSTS_LIMIT) -> CursorPaginator:
+    entries = CursorPaginator(
+        FeedEntry.objects.filter(user=user).select_related(
+            "post__author", "post__group"
+        ),
+        per_page,
+        ordering=FEED_ORDERING,
+        transform=attrgetter("post"),
+        keys=("pub_date", "id"),
+    )
+    authors = read_time_authors(user)
+    if not authors:
+        return entries
+    pulled = CursorPaginator(
+        Post.objects.filter(author_id__in=authors).select_related(
+            "author", "group"
+        ),
+        per_page,
+    )
+    return MergedCursorPaginator([entries, pulled], per_page)
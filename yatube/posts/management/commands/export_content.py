@@ -0,0 +1,86 @@
+import os
+import shutil
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (
+    CONTENT_FILE,
+    MEDIA_DIR,
+    SECTIONS,
+    ContentEncoder,
+)
+
+# Как часто печатать прогресс, в секундах.
+REPORT_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, группы, посты с картинками, комментарии "
+        "и подписки в каталог: content.jsonl и media/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Каталог выгрузки.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2_000,
+            help="Строк, читаемых из базы за один запрос.",
+        )
+        parser.add_argument(
+            "--no-media",
+            action="store_true",
+            help="Не копировать файлы картинок.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        self.media = None
+        if not options["no_media"]:
+            self.media = os.path.join(path, MEDIA_DIR)
+            os.makedirs(self.media, exist_ok=True)
+        os.makedirs(path, exist_ok=True)
+
+        encoder = ContentEncoder(ensure_ascii=False)
+        with open(
+            os.path.join(path, CONTENT_FILE), "w", encoding="utf-8"
+        ) as out:
+            for name, (model, fields) in SECTIONS.items():
+                rows = (
+                    model.objects.order_by("id")
+                    .values("id", *fields)
+                    .iterator(chunk_size=options["batch_size"])
+                )
+                started = reported = time.monotonic()
+                count = 0
+                for row in rows:
+                    if self.media and row.get("image"):
+                        self.copy_image(row["image"])
+                    out.write(encoder.encode({"model": name, **row}))
+                    out.write("\n")
+                    count += 1
+                    if time.monotonic() - reported >= REPORT_INTERVAL:
+                        reported = time.monotonic()
+                        self.report(name, count, started)
+                self.report(name, count, started)
+
+    def copy_image(self, name):
+        target = os.path.join(self.media, name)
+        if os.path.exists(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            with default_storage.open(name) as source, open(
+                target, "wb"
+            ) as copy:
+                shutil.copyfileobj(source, copy)
+        except OSError as error:
+            self.stderr.write(f"Картинка {name} не скопирована: {error}")
+
+    def report(self, name, count, started):
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(f"{name}: {count} строк, {rate:.0f} строк/с")
@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+
+# Процессы запускаются через spawn: дочерний процесс настраивает Django
+# заново и открывает свои соединения с базой, а не наследует чужие.
+# Поэтому модели импортируются внутри функций, а не на уровне модуля.
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _render(job):
+    from posts.models import Post
+    from posts.thumbnails import render_thumbnails
+
+    post_id, image_name = job
+    image = Post(id=post_id, image=image_name).image
+    try:
+        return post_id, image_name, render_thumbnails(image), None
+    except Exception as error:
+        return post_id, image_name, None, str(error)
+
+
+class Command(BaseCommand):
+    help = "Строит миниатюры для постов с картинками в пуле процессов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Перестроить миниатюры и у постов, где они уже есть.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Число процессов (по умолчанию — число ядер).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        from posts.models import Post
+        from posts.thumbnails import save_thumbnails
+
+        posts = Post.objects.exclude(image="")
+        if not options["all"]:
+            posts = posts.filter(thumbnails="")
+        jobs = posts.order_by("id").values_list("id", "image")
+
+        started = time.monotonic()
+        done = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        ) as pool:
+            results = pool.map(
+                _render,
+                jobs.iterator(chunk_size=options["batch_size"]),
+                chunksize=16,
+            )
+            for post_id, image_name, urls, error in results:
+                if error is not None:
+                    failed += 1
+                    self.stderr.write(f"Пост {post_id}: {error}")
+                    continue
+                if save_thumbnails(post_id, image_name, urls):
+                    done += 1
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: {done}, ошибок: {failed}, {elapsed:.1f} с."
+            )
+        )
@@ -0,0 +1,214 @@
+import json
+import os
+import time
+
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from posts import counters, feed, search, tasks
+from posts.models import Comment, Post
+from posts.transfer import CONTENT_FILE, MEDIA_DIR, SECTIONS, IdMap
+
+from .seed_data import manual_dates
+
+# Как часто печатать прогресс, в секундах.
+REPORT_INTERVAL = 5
+# Размер списка в запросе ... WHERE field IN (...) при поиске совпадений.
+LOOKUP_CHUNK = 500
+# Размер куска при сравнении картинок.
+COMPARE_CHUNK = 64 * 1024
+
+# Секция -> поле, по которому строка совпадает с уже существующей.
+NATURAL_KEYS = {"user": "username", "group": "slug"}
+# Поле -> секция, id которой в нем хранится.
+REFERENCES = {
+    "author_id": "user",
+    "user_id": "user",
+    "group_id": "group",
+    "post_id": "post",
+}
+DATE_FIELDS = ("date_joined", "pub_date", "updated", "created")
+
+
+def same_content(name: str, source: str) -> bool:
+    if default_storage.size(name) != os.path.getsize(source):
+        return False
+    with default_storage.open(name) as stored, open(source, "rb") as new:
+        while True:
+            chunk = new.read(COMPARE_CHUNK)
+            if chunk != stored.read(COMPARE_CHUNK):
+                return False
+            if not chunk:
+                return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает выгрузку export_content: пачками через bulk_create, "
+        "с переназначением id и ссылок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Каталог выгрузки.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5_000,
+            help="Строк в одном bulk_create и одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        content = os.path.join(path, CONTENT_FILE)
+        if not os.path.exists(content):
+            raise CommandError(f"Нет файла {content}.")
+        self.media = os.path.join(path, MEDIA_DIR)
+        self.batch_size = options["batch_size"]
+        self.maps = {}
+
+        with manual_dates(
+            Post._meta.get_field("pub_date"),
+            Post._meta.get_field("updated"),
+            Comment._meta.get_field("created"),
+        ), open(content, encoding="utf-8") as lines:
+            section = None
+            batch = []
+            for number, line in enumerate(lines, 1):
+                row = json.loads(line)
+                name = row.pop("model")
+                if name != section:
+                    if section is not None:
+                        self.finish_section(section, batch)
+                    self.start_section(name, number)
+                    section, batch = name, []
+                batch.append(row)
+                if len(batch) == self.batch_size:
+                    self.write(section, batch)
+                    batch = []
+            if section is not None:
+                self.finish_section(section, batch)
+
+        started = time.monotonic()
+        self.reset_sequences()
+        with transaction.atomic():
+            counters.recount_all()
+            feed.rebuild()
+        search.rebuild(self.batch_size)
+        cache.clear()
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"derived data: {elapsed:.1f} с")
+        self.schedule_thumbnails()
+
+    def start_section(self, name, number):
+        if name not in SECTIONS:
+            raise CommandError(f"Строка {number}: неизвестная модель {name}.")
+        if name in self.maps:
+            raise CommandError(f"Строка {number}: секция {name} повторяется.")
+        model = SECTIONS[name][0]
+        offset = model.objects.aggregate(top=Max("id"))["top"] or 0
+        self.maps[name] = IdMap(offset)
+        self.started = self.reported = time.monotonic()
+        self.count = 0
+
+    def finish_section(self, name, batch):
+        if batch:
+            self.write(name, batch)
+        self.report(name)
+
+    def write(self, name, rows):
+        """Сохраняет пачку строк одной транзакцией."""
+        model = SECTIONS[name][0]
+        id_map = self.maps[name]
+        self.count += len(rows)
+        if name in NATURAL_KEYS:
+            rows = self.skip_existing(name, rows)
+        objects = []
+        for row in rows:
+            row["id"] = id_map[row["id"]]
+            for field, target in REFERENCES.items():
+                if row.get(field) is not None:
+                    row[field] = self.maps[target][row[field]]
+            for field in DATE_FIELDS:
+                if field in row:
+                    row[field] = parse_datetime(row[field])
+            if row.get("image"):
+                row["image"] = self.copy_image(row["image"])
+            objects.append(model(**row))
+        with transaction.atomic():
+            model.objects.bulk_create(
+                objects, ignore_conflicts=name == "follow"
+            )
+
+        if time.monotonic() - self.reported >= REPORT_INTERVAL:
+            self.reported = time.monotonic()
+            self.report(name)
+
+    def skip_existing(self, name, rows):
+        """Отбрасывает строки, совпавшие с существующими, и запоминает их."""
+        model = SECTIONS[name][0]
+        key = NATURAL_KEYS[name]
+        existing = {}
+        for start in range(0, len(rows), LOOKUP_CHUNK):
+            end = start + LOOKUP_CHUNK
+            values = [row[key] for row in rows[start:end]]
+            existing.update(
+                model.objects.filter(**{f"{key}__in": values}).values_list(
+                    key, "id"
+                )
+            )
+        id_map = self.maps[name]
+        fresh = []
+        for row in rows:
+            if row[key] in existing:
+                id_map.matched[row["id"]] = existing[row[key]]
+            else:
+                fresh.append(row)
+        return fresh
+
+    def copy_image(self, name):
+        """Кладет картинку в хранилище и возвращает ее имя там.
+
+        Файл с тем же именем берется, только если совпадает содержимым:
+        имена вроде posts/image.jpg у разных сайтов повторяются.
+        """
+        source = os.path.join(self.media, name)
+        if not os.path.exists(source):
+            return name
+        if default_storage.exists(name) and same_content(name, source):
+            return name
+        with open(source, "rb") as image:
+            return default_storage.save(name, File(image))
+
+    def schedule_thumbnails(self):
+        """Ставит в очередь миниатюры загруженных постов."""
+        if "post" not in self.maps:
+            return
+        posts = (
+            Post.objects.filter(id__gt=self.maps["post"].offset)
+            .exclude(image="")
+            .values_list("id", flat=True)
+        )
+        scheduled = 0
+        for post_id in posts.iterator():
+            tasks.generate_thumbnails.delay(post_id=post_id)
+            scheduled += 1
+        self.stdout.write(f"thumbnails: {scheduled} задач")
+
+    def reset_sequences(self):
+        """Продвигает последовательности id после вставки явных id."""
+        models = [model for model, _ in SECTIONS.values()]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def report(self, name):
+        elapsed = time.monotonic() - self.started
+        rate = self.count / elapsed if elapsed else 0
+        self.stdout.write(f"{name}: {self.count} строк, {rate:.0f} строк/с")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import SEARCH_BATCH_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=SEARCH_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Проиндексировано постов: {indexed}")
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_all
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает денормализованные счетчики постов и авторов."
+
+    def handle(self, *args, **options):
+        drift = recount_all()
+        for counter, fixed in drift.items():
+            self.stdout.write(f"{counter}: исправлено строк {fixed}")
+        self.stdout.write(self.style.SUCCESS("Счетчики пересчитаны."))
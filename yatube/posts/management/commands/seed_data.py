@@ -0,0 +1,216 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts import counters, feed, search
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+WORDS = (
+    "сегодня вчера город море лес кот собака книга фильм музыка дорога "
+    "утро вечер работа отпуск друзья погода дождь солнце снег праздник "
+    "фото поездка кофе ужин проект код релиз тест идея вопрос ответ"
+).split()
+
+# Размеры при --scale 1; вместе с --scale 10 это миллионы строк.
+DEFAULT_SIZES = {
+    "users": 20_000,
+    "groups": 200,
+    "posts": 200_000,
+    "comments": 400_000,
+    "follows": 200_000,
+}
+
+
+@contextmanager
+def manual_dates(*fields):
+    """Отключает auto_now и auto_now_add, чтобы сохранялись наши даты."""
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def zipf_weights(size: int, exponent: float):
+    """Накопленные веса закона Ципфа: немногие получают почти все."""
+    return list(
+        accumulate(1 / rank**exponent for rank in range(1, size + 1))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими пользователями, группами, постами, "
+        "комментариями и подписками с реалистичным перекосом."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Множитель размеров по умолчанию.",
+        )
+        for name, size in DEFAULT_SIZES.items():
+            parser.add_argument(f"--{name}", type=int, help=f"({size})")
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        sizes = {
+            name: options[name] or max(1, int(size * options["scale"]))
+            for name, size in DEFAULT_SIZES.items()
+        }
+        self.now = timezone.now()
+        self.period = timedelta(days=options["days"]).total_seconds()
+
+        steps = (
+            ("users", self.create_users),
+            ("groups", self.create_groups),
+            ("posts", self.create_posts),
+            ("comments", self.create_comments),
+            ("follows", self.create_follows),
+        )
+        for name, step in steps:
+            started = time.monotonic()
+            with transaction.atomic():
+                step(sizes[name])
+            self.report(name, sizes[name], started)
+
+        started = time.monotonic()
+        with transaction.atomic():
+            counters.recount_all()
+            feed.rebuild()
+        search.rebuild(self.batch_size)
+        if connection.vendor == "sqlite":
+            # Статистика для планировщика и оценки числа постов
+            # в пагинаторе (posts.utils.table_estimate).
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.report("derived data", None, started)
+
+    def report(self, name, size, started):
+        elapsed = time.monotonic() - started
+        total = f"{size}: " if size is not None else ""
+        self.stdout.write(f"{name}: {total}{elapsed:.1f} с")
+
+    def bulk(self, model, objects, **kwargs):
+        """bulk_create пачками, не держа все объекты в памяти."""
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch, **kwargs)
+                batch = []
+        model.objects.bulk_create(batch, **kwargs)
+
+    def moment(self):
+        """Время в прошлом; свежие записи встречаются чаще старых."""
+        age = self.period * self.random.random() ** 2
+        return self.now - timedelta(seconds=age)
+
+    def text(self, words):
+        return " ".join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def skewed(self, population, exponent=1.1):
+        """Бесконечный поток элементов с перекосом по Ципфу."""
+        population = list(population)
+        self.random.shuffle(population)
+        weights = zipf_weights(len(population), exponent)
+        while True:
+            yield from self.random.choices(
+                population, cum_weights=weights, k=self.batch_size
+            )
+
+    def create_users(self, size):
+        start = User.objects.count()
+        self.bulk(
+            User,
+            (
+                User(username=f"user{start + number}", password="!")
+                for number in range(size)
+            ),
+        )
+
+    def create_groups(self, size):
+        start = Group.objects.count()
+        self.bulk(
+            Group,
+            (
+                Group(
+                    title=f"Группа {start + number}",
+                    slug=f"group-{start + number}",
+                    description=self.text(12),
+                )
+                for number in range(size)
+            ),
+        )
+
+    def create_posts(self, size):
+        authors = self.skewed(User.objects.values_list("id", flat=True))
+        groups = self.skewed(Group.objects.values_list("id", flat=True))
+        with manual_dates(Post._meta.get_field("pub_date")):
+            self.bulk(
+                Post,
+                (
+                    Post(
+                        author_id=next(authors),
+                        group_id=(
+                            next(groups)
+                            if self.random.random() < 0.6
+                            else None
+                        ),
+                        text=self.text(self.random.randint(5, 60)),
+                        pub_date=self.moment(),
+                    )
+                    for _ in range(size)
+                ),
+            )
+
+    def create_comments(self, size):
+        posts = self.skewed(Post.objects.values_list("id", flat=True), 0.8)
+        authors = self.skewed(User.objects.values_list("id", flat=True), 0.6)
+        with manual_dates(Comment._meta.get_field("created")):
+            self.bulk(
+                Comment,
+                (
+                    Comment(
+                        post_id=next(posts),
+                        author_id=next(authors),
+                        text=self.text(self.random.randint(2, 20)),
+                        created=self.moment(),
+                    )
+                    for _ in range(size)
+                ),
+            )
+
+    def create_follows(self, size):
+        user_ids = list(User.objects.values_list("id", flat=True))
+        authors = self.skewed(user_ids, 1.2)
+        self.bulk(
+            Follow,
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in (
+                    (self.random.choice(user_ids), next(authors))
+                    for _ in range(size)
+                )
+                if user_id != author_id
+            ),
+            ignore_conflicts=True,
+        )
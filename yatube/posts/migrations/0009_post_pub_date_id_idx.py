@@ -0,0 +1,19 @@
+# Generated by Django 2.2.19 on 2026-10-18 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0008_auto_20220216_1554"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 2.2.19 on 2026-10-18 05:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_feeds(apps, schema_editor):
+    """Раскладывает существующие подписки, как posts.feed.rebuild()."""
+    FeedEntry = apps.get_model("posts", "FeedEntry")
+    Post = apps.get_model("posts", "Post")
+    Follow = apps.get_model("posts", "Follow")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {FeedEntry._meta.db_table}
+                (user_id, post_id, author_id, pub_date)
+            SELECT follow.user_id, post.id, post.author_id, post.pub_date
+            FROM (
+                SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+                    PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+                ) AS position
+                FROM {Post._meta.db_table}
+            ) AS post
+            JOIN {Follow._meta.db_table} AS follow
+                ON follow.author_id = post.author_id
+            WHERE post.position <= %s
+                AND (
+                    SELECT COUNT(*) FROM {Follow._meta.db_table} AS other
+                    WHERE other.author_id = post.author_id
+                ) <= %s
+            """,
+            [settings.FEED_BACKFILL_LIMIT, settings.FEED_FANOUT_LIMIT],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0009_post_pub_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("pub_date", models.DateTimeField()),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to="posts.Post",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-pub_date",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="feedentry",
+            index=models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="feed_user_pub_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="feedentry",
+            index=models.Index(
+                fields=["user", "author"], name="feed_user_author_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="feedentry",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="unique_feed_entry"
+            ),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 2.2.19 on 2026-10-18 05:38
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    AuthorStats = apps.get_model("posts", "AuthorStats")
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    Follow = apps.get_model("posts", "Follow")
+
+    def count(model, field, outer):
+        counted = (
+            model.objects.filter(**{field: models.OuterRef(outer)})
+            .order_by()
+            .values(field)
+            .annotate(total=models.Count("*"))
+            .values("total")
+        )
+        return Coalesce(models.Subquery(counted), models.Value(0))
+
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(user_id=pk)
+            for pk in User.objects.values_list("pk", flat=True)
+        ]
+    )
+    AuthorStats.objects.update(
+        posts_count=count(Post, "author", "user_id"),
+        comments_count=count(Comment, "author", "user_id"),
+        followers_count=count(Follow, "author", "user_id"),
+        following_count=count(Follow, "user", "user_id"),
+    )
+    Post.objects.update(comments_count=count(Comment, "post", "pk"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0010_feedentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthorStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("posts_count", models.PositiveIntegerField(default=0)),
+                ("comments_count", models.PositiveIntegerField(default=0)),
+                ("followers_count", models.PositiveIntegerField(default=0)),
+                ("following_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Статистика автора",
+                "verbose_name_plural": "Статистика авторов",
+            },
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.19 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0011_authorstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="thumbnails",
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
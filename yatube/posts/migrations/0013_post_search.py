@@ -0,0 +1,69 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+
+SEARCH_TABLE = "posts_post_search"
+
+# Копия posts.search.normalize на момент миграции: код приложения может
+# измениться, а миграция должна строить индекс так же, как раньше.
+WORD_RE = re.compile(r"\w+")
+CYRILLIC_RE = re.compile(r"[а-яё]")
+STEMMERS = {
+    "russian": snowballstemmer.stemmer("russian"),
+    "english": snowballstemmer.stemmer("english"),
+}
+
+
+def normalize(text):
+    stems = []
+    for word in WORD_RE.findall(text.lower()):
+        language = "russian" if CYRILLIC_RE.search(word) else "english"
+        stems.append(STEMMERS[language].stemWord(word))
+    return stems
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "body, tokenize='unicode61 remove_diacritics 2')"
+        )
+        Post = apps.get_model("posts", "Post")
+        rows = [
+            (post_id, " ".join(normalize(text)))
+            for post_id, text in Post.objects.values_list("id", "text")
+        ]
+        with schema_editor.connection.cursor() as cursor:
+            for row in rows:
+                cursor.execute(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, body) "
+                    "VALUES (%s, %s)",
+                    row,
+                )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX posts_post_text_search_idx ON posts_post "
+            "USING GIN (to_tsvector('russian'::regconfig, text))"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE {SEARCH_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX posts_post_text_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0012_post_thumbnails"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
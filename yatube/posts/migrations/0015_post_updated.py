@@ -0,0 +1,20 @@
+# Generated by Django 2.2.19 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0014_feed_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="updated",
+            field=models.DateTimeField(
+                auto_now=True, verbose_name="Дата изменения"
+            ),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -18,6 +20,7 @@ class Group(models.Model):
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField("Дата изменения", auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -31,13 +34,79 @@ class Post(models.Model):
         related_name="posts",
     )
     image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    thumbnails = models.TextField(blank=True, editable=False)
 
     class Meta:
         ordering = ("-pub_date",)
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+        ]
+
+    # Эти поля меняют UPDATE счетчиков и задача миниатюр. Сохранение
+    # поста из формы или админки записало бы поверх их свежих значений
+    # прочитанные вместе с постом.
+    BACKGROUND_FIELDS = ("comments_count", "thumbnails")
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        post._remember_image()
+        return post
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_image()
+
+    def _remember_image(self) -> None:
+        """Запоминает картинку, которая сейчас записана в базе."""
+        if "image" in self.__dict__:
+            self._saved_image = self.image.name or ""
+
+    def save(self, *args, **kwargs):
+        if (
+            self._state.adding
+            or kwargs.get("force_insert")
+            or kwargs.get("update_fields") is not None
+        ):
+            super().save(*args, **kwargs)
+            self._remember_image()
+            return
+        deferred = self.get_deferred_fields()
+        fields = [
+            field.name
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname not in deferred
+            and field.name not in self.BACKGROUND_FIELDS
+        ]
+        saved_image = getattr(self, "_saved_image", None)
+        if saved_image is not None and (self.image.name or "") != saved_image:
+            # Миниатюры старой картинки больше не подходят, новые
+            # построит фоновая задача posts.tasks.generate_thumbnails.
+            self.thumbnails = ""
+            fields.append("thumbnails")
+        super().save(*args, update_fields=fields, **kwargs)
+        self._remember_image()
+
+    @property
+    def thumbnail_urls(self) -> dict:
+        """URL готовых миниатюр по именам из posts.thumbnails."""
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -58,6 +127,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ("-created",)
+        indexes = [
+            models.Index(
+                fields=["post", "-created", "-id"],
+                name="comment_post_created_idx",
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -80,3 +155,72 @@ class Follow(models.Model):
                 fields=["user", "author"], name="unique_following"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="follow_author_user_idx"
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики пользователя.
+
+    Обновляются сигналами из posts.counters, расхождения исправляет
+    команда recount_stats.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Статистика автора"
+        verbose_name_plural = "Статистика авторов"
+
+    def __str__(self):
+        return f"Статистика {self.user}"
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ("-pub_date",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_feed_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="feed_user_pub_date_idx",
+            ),
+            models.Index(
+                fields=["user", "author"], name="feed_user_author_idx"
+            ),
+        ]
@@ -0,0 +1,163 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite посты индексируются в виртуальной таблице FTS5. Стемминг
+делается в Python (snowball): в индекс и в запрос попадают основы слов,
+поэтому «котики» находит «котиков». Индекс обновляется сигналами
+сохранения и удаления поста, а rebuild() перестраивает его пачками.
+
+На PostgreSQL используется to_tsvector('russian', text) с GIN-индексом
+из миграции; отдельно поддерживать индекс там не нужно.
+
+search_posts() возвращает посты с аннотацией rank и порядок выдачи по
+релевантности (bm25 / ts_rank); по паре (rank, id) страницы листаются
+только курсором: с номером страницы нужен COUNT(*), а bm25 внутри
+подзапроса подсчета SQLite вычислить не может.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+import snowballstemmer
+from django.db import connection, transaction
+from django.db.models import FloatField, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .utils import POSTS_ORDERING
+
+
+SEARCH_TABLE = "posts_post_search"
+SEARCH_CONFIG = "russian"
+SEARCH_BATCH_SIZE = 500
+# Выражение GIN-индекса из миграции 0013 слово в слово: SearchVector
+# оборачивает поле в COALESCE, и с ним PostgreSQL индекс не использует.
+SEARCH_DOCUMENT = (
+    f"to_tsvector('{SEARCH_CONFIG}'::regconfig, {Post._meta.db_table}.text)"
+)
+SEARCH_QUERY = f"plainto_tsquery('{SEARCH_CONFIG}'::regconfig, %s)"
+
+WORD_RE = re.compile(r"\w+")
+CYRILLIC_RE = re.compile(r"[а-яё]")
+
+_stemmers = {
+    "russian": snowballstemmer.stemmer("russian"),
+    "english": snowballstemmer.stemmer("english"),
+}
+
+
+class RankField(FloatField):
+    """Ранг поиска; значение из курсора должно быть конечным числом."""
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is not None and not math.isfinite(value):
+            raise ValueError(f"Rank must be finite, got {value!r}.")
+        return value
+
+
+def uses_fts5() -> bool:
+    return connection.vendor == "sqlite"
+
+
+# Snowball на чистом Python медленный, а словарь постов невелик и
+# сильно повторяется: кэш основ ускоряет переиндексацию в десятки раз.
+@lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    language = "russian" if CYRILLIC_RE.search(word) else "english"
+    return _stemmers[language].stemWord(word)
+
+
+def normalize(text: str) -> List[str]:
+    """Основы слов текста в нижнем регистре."""
+    return [stem(word) for word in WORD_RE.findall(text.lower())]
+
+
+def match_expression(query: str) -> str:
+    """Запрос FTS5: все основы слов должны встретиться в посте.
+
+    Каждая основа берется в кавычки, поэтому операторы FTS5 из
+    пользовательского ввода не интерпретируются.
+    """
+    return " ".join(f'"{term}"' for term in normalize(query))
+
+
+def index_posts(posts: Iterable[Post]) -> None:
+    if not uses_fts5():
+        return
+    rows = [(post.id, " ".join(normalize(post.text))) for post in posts]
+    if not rows:
+        return
+    # По строке на запрос, а не executemany: обертки курсора вроде
+    # debug-toolbar подставляют параметры executemany как для execute.
+    with connection.cursor() as cursor:
+        for post_id, body in rows:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [post_id]
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, body) VALUES (%s, %s)",
+                [post_id, body],
+            )
+
+
+def remove_post(post_id: int) -> None:
+    if not uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [post_id]
+        )
+
+
+def rebuild(batch_size: int = SEARCH_BATCH_SIZE) -> int:
+    """Переиндексирует все посты пачками; возвращает их число.
+
+    Перестройка идет в одной транзакции, поэтому поиск не видит
+    наполовину пустой индекс.
+    """
+    if not uses_fts5():
+        return 0
+    indexed = 0
+    batch = []
+    posts = Post.objects.only("id", "text").order_by("id")
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for post in posts.iterator(chunk_size=batch_size):
+            batch.append(post)
+            if len(batch) == batch_size:
+                index_posts(batch)
+                indexed += len(batch)
+                batch = []
+        index_posts(batch)
+    return indexed + len(batch)
+
+
+def search_posts(query: str) -> Tuple[QuerySet, Tuple[str, ...]]:
+    """Посты, подходящие под запрос, с рангом и порядком выдачи."""
+    if not normalize(query):
+        return Post.objects.none(), POSTS_ORDERING
+    if uses_fts5():
+        # bm25() тем меньше, чем пост релевантнее, поэтому порядок
+        # возрастающий.
+        records = Post.objects.extra(
+            tables=[SEARCH_TABLE],
+            where=[
+                f"{SEARCH_TABLE} MATCH %s",
+                f"{SEARCH_TABLE}.rowid = posts_post.id",
+            ],
+            params=[match_expression(query)],
+        ).annotate(rank=RawSQL(f"bm25({SEARCH_TABLE})", (), RankField()))
+        return records, ("rank", "id")
+
+    records = Post.objects.extra(
+        where=[f"{SEARCH_DOCUMENT} @@ {SEARCH_QUERY}"], params=[query]
+    ).annotate(
+        rank=RawSQL(
+            f"ts_rank({SEARCH_DOCUMENT}, {SEARCH_QUERY})",
+            (query,),
+            RankField(),
+        )
+    )
+    return records, ("-rank", "-id")
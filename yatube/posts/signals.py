@@ -0,0 +1,112 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.page_cache import bump_tags
+
+from . import cache, counters, feed, search, tasks
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_author(instance.author_id, "posts_count", 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, "posts_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_post_comments(instance.post_id, 1)
+        counters.bump_author(instance.author_id, "comments_count", 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.bump_post_comments(instance.post_id, -1)
+    counters.bump_author(instance.author_id, "comments_count", -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_author(instance.author_id, "followers_count", 1)
+        counters.bump_author(instance.user_id, "following_count", 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, "followers_count", -1)
+    counters.bump_author(instance.user_id, "following_count", -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        tasks.fan_out_post.delay(post_id=instance.id)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        tasks.backfill_feed.delay(
+            user_id=instance.user_id, author_id=instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def trim_feed(sender, instance, **kwargs):
+    feed.trim(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or "text" in update_fields:
+        tasks.index_post.delay(post_id=instance.id)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, raw=False, **kwargs):
+    instance._old_group_id = None
+    if instance.pk and not raw:
+        instance._old_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list("group_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    cache.invalidate_post(instance, getattr(instance, "_old_group_id", None))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    bump_tags(cache.comments_tag(instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    bump_tags(cache.group_tag(instance.id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_author_pages(sender, instance, **kwargs):
+    bump_tags(
+        cache.author_tag(instance.author_id),
+        cache.follows_tag(instance.user_id),
+    )
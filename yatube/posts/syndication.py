@@ -0,0 +1,127 @@
+"""Ленты Atom и RSS для групп, авторов и подписок.
+
+Документ собирается по одной записи и отдается через
+StreamingHttpResponse: клиент получает начало ленты до того, как
+прочитаны все посты, а память процесса не зависит от длины ленты.
+"""
+import io
+from itertools import chain
+from typing import Iterable, Iterator
+
+from django.http import Http404, HttpRequest, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.http import http_date
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .models import Post
+
+
+FEED_ITEMS_LIMIT: int = 50
+FEED_ENCODING = "utf-8"
+FEED_TITLE_WORDS = 8
+# Метка места, куда вставляются записи, в заготовке документа.
+_ITEMS_MARK = "\x00"
+
+
+class StreamingFeedMixin:
+    """Пишет ленту по частям: заголовок, записи по одной, окончание."""
+
+    item_element = "item"
+
+    def latest_post_date(self):
+        return self.feed.get("updated") or super().latest_post_date()
+
+    def write_items(self, handler):
+        handler.ignorableWhitespace(_ITEMS_MARK)
+
+    def stream(self, items: Iterable[dict]) -> Iterator[bytes]:
+        document = io.StringIO()
+        self.write(document, FEED_ENCODING)
+        head, tail = document.getvalue().split(_ITEMS_MARK)
+        yield head.encode(FEED_ENCODING)
+
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, FEED_ENCODING)
+        for kwargs in items:
+            self.add_item(**kwargs)
+            item = self.items.pop()
+            handler.startElement(self.item_element, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield buffer.getvalue().encode(FEED_ENCODING)
+            buffer.seek(0)
+            buffer.truncate()
+        yield tail.encode(FEED_ENCODING)
+
+
+class AtomFeed(StreamingFeedMixin, feedgenerator.Atom1Feed):
+    item_element = "entry"
+
+
+class RssFeed(StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    pass
+
+
+FEED_CLASSES = {"atom": AtomFeed, "rss": RssFeed}
+
+
+def feed_class(feed_format: str):
+    try:
+        return FEED_CLASSES[feed_format]
+    except KeyError:
+        raise Http404("Неизвестный формат ленты.")
+
+
+def post_item(request: HttpRequest, post: Post) -> dict:
+    link = request.build_absolute_uri(
+        reverse("posts:post_detail", kwargs={"post_id": post.id})
+    )
+    return {
+        "title": Truncator(post.text).words(FEED_TITLE_WORDS),
+        "link": link,
+        "unique_id": link,
+        "description": post.text,
+        "author_name": post.author.get_full_name() or post.author.username,
+        "author_link": request.build_absolute_uri(
+            reverse("posts:profile", kwargs={"username": post.author})
+        ),
+        "pubdate": post.pub_date,
+        "categories": [post.group.title] if post.group else (),
+    }
+
+
+def feed_response(
+    request: HttpRequest,
+    feed_format: str,
+    posts: Iterable[Post],
+    title: str,
+    link: str,
+    description: str,
+) -> StreamingHttpResponse:
+    """Потоковый ответ с лентой из posts, новые посты первыми.
+
+    Первый пост читается сразу: ошибка базы превращается в обычный
+    ответ 500, а дата поста становится заголовком Last-Modified.
+    """
+    feed_type = feed_class(feed_format)
+    posts = iter(posts)
+    first = next(posts, None)
+    updated = first.pub_date if first is not None else None
+    feed = feed_type(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description,
+        language="ru",
+        feed_url=request.build_absolute_uri(),
+        updated=updated,
+    )
+    posts = chain([first], posts) if first is not None else ()
+    response = StreamingHttpResponse(
+        feed.stream(post_item(request, post) for post in posts),
+        content_type=feed.content_type,
+    )
+    if updated is not None:
+        response["Last-Modified"] = http_date(updated.timestamp())
+    return response
@@ -0,0 +1,34 @@
+"""Фоновые задачи приложения posts, выполняются через core.tasks.
+
+Задачи получают id, а не объекты, и перечитывают данные: пока задача
+ждала в очереди, пост могли удалить, а подписку — отменить.
+"""
+from core.tasks import task
+
+from . import feed, search, thumbnails
+from .models import Follow, Post
+
+
+@task
+def fan_out_post(post_id: int) -> None:
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        feed.fan_out_post(post)
+
+
+@task
+def backfill_feed(user_id: int, author_id: int) -> None:
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        feed.backfill(user_id, author_id)
+
+
+@task
+def index_post(post_id: int) -> None:
+    post = Post.objects.only("id", "text").filter(pk=post_id).first()
+    if post is not None:
+        search.index_posts([post])
+
+
+@task
+def generate_thumbnails(post_id: int) -> None:
+    thumbnails.generate_for(post_id)
@@ -0,0 +1,16 @@
+from django import template
+
+from ..articles import render_articles
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def cached_articles(posts):
+    """Посты списка вместе с HTML из кэша posts.articles.
+
+    {% cached_articles page_obj as articles %}
+    {% for post, article in articles %}{{ article }}{% endfor %}
+    """
+    return render_articles(posts)
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.cache import get_stats
+
+from ..articles import ARTICLE_STATS_NAME, render_articles
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ArticleCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        for number in range(3):
+            Post.objects.create(
+                author=cls.author, text=f"Пост {number}", group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def posts(self):
+        return Post.objects.select_related("author")
+
+    def test_listings_share_rendered_articles(self):
+        """Посты, отрендеренные для одной страницы, берутся из кэша."""
+        self.client.get(reverse("posts:group_list", kwargs={"slug": "group"}))
+        self.client.get(
+            reverse("posts:profile", kwargs={"username": "author"})
+        )
+        stats = get_stats([ARTICLE_STATS_NAME])[ARTICLE_STATS_NAME]
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["hits"], 3)
+
+    def test_changes_render_article_again(self):
+        """Правка поста и смена имени автора дают новый HTML."""
+        render_articles(self.posts())
+        post = Post.objects.first()
+        post.text = "Исправленный пост"
+        post.save()
+        self.author.first_name = "Новое"
+        self.author.last_name = "Имя"
+        self.author.save()
+
+        articles = dict(render_articles(self.posts()))
+        for rendered_post, article in articles.items():
+            with self.subTest(post=rendered_post.id):
+                self.assertIn("Новое Имя", article)
+        self.assertIn("Исправленный пост", articles[post])
@@ -0,0 +1,195 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from core.cache import acquire_lock, release_lock
+from core.page_cache import page_key
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Первая группа", slug="first", description="Описание"
+        )
+        cls.other_group = Group.objects.create(
+            title="Вторая группа", slug="second", description="Описание"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            author=self.author, text="Первый пост", group=self.group
+        )
+
+    def test_anonymous_page_is_served_from_cache(self):
+        """Повторный анонимный запрос не обращается к базе."""
+        url = reverse("posts:index")
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_new_post_appears_on_cached_index(self):
+        """Новый пост сразу виден на главной из кэша страниц."""
+        url = reverse("posts:index")
+        self.guest_client.get(url)
+        Post.objects.create(author=self.reader, text="Свежий пост")
+        self.assertContains(self.guest_client.get(url), "Свежий пост")
+
+    def test_authorized_user_is_not_served_from_cache(self):
+        """Авторизованные пользователи получают свежую страницу."""
+        self.guest_client.get(reverse("posts:index"))
+        authorized_client = Client()
+        authorized_client.force_login(self.reader)
+        response = authorized_client.get(reverse("posts:index"))
+        self.assertIsNotNone(response.context)
+
+    def test_data_changes_invalidate_dependent_pages(self):
+        """Изменение данных сбрасывает только зависящие страницы."""
+        pages = {
+            "index": reverse("posts:index"),
+            "post": reverse(
+                "posts:post_detail", kwargs={"post_id": self.post.id}
+            ),
+            "comments": reverse(
+                "posts:post_comments", kwargs={"post_id": self.post.id}
+            ),
+            "profile": reverse(
+                "posts:profile", kwargs={"username": self.author}
+            ),
+            "group": reverse("posts:group_list", kwargs={"slug": "first"}),
+            "other": reverse("posts:group_list", kwargs={"slug": "second"}),
+        }
+        changes = {
+            "comment": (
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.reader, text="Комментарий"
+                ),
+                {"comments"},
+            ),
+            "follow": (
+                lambda: Follow.objects.create(
+                    user=self.reader, author=self.author
+                ),
+                {"post", "profile"},
+            ),
+            "new post": (
+                lambda: Post.objects.create(
+                    author=self.reader, text="Второй пост"
+                ),
+                {"index"},
+            ),
+        }
+        for change, (action, invalidated) in changes.items():
+            with self.subTest(change=change):
+                for url in pages.values():
+                    self.guest_client.get(url)
+                action()
+                for name, url in pages.items():
+                    response = self.guest_client.get(url)
+                    self.assertEqual(
+                        response.context is not None,
+                        name in invalidated,
+                        name,
+                    )
+
+    def test_moving_post_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает обе страницы групп."""
+        old_group_url = reverse("posts:group_list", kwargs={"slug": "first"})
+        self.guest_client.get(old_group_url)
+        self.post.group = self.other_group
+        self.post.save()
+        response = self.guest_client.get(old_group_url)
+        self.assertEqual(len(response.context["page_obj"]), 0)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text="Пост", group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.pages = {
+            "post": reverse(
+                "posts:post_detail", kwargs={"post_id": self.post.id}
+            ),
+            "profile": reverse("posts:profile", kwargs={"username": "author"}),
+            "group": reverse("posts:group_list", kwargs={"slug": "group"}),
+        }
+
+    def test_unchanged_page_is_not_modified(self):
+        """Повторный запрос с валидатором получает 304 без запросов."""
+        for name, url in self.pages.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(url)
+                self.assertIn("public", response["Cache-Control"])
+                with self.assertNumQueries(0):
+                    again = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response["ETag"]
+                    )
+                self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_changed_data_returns_full_page(self):
+        """После изменения данных страница отдается целиком."""
+        url = self.pages["post"]
+        etag = self.guest_client.get(url)["ETag"]
+        self.post.text = "Новый текст"
+        self.post.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, "Новый текст")
+        since = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(since.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_validator_depends_on_visitor(self):
+        """ETag гостя не подходит авторизованному пользователю."""
+        url = self.pages["profile"]
+        etag = self.guest_client.get(url)["ETag"]
+        authorized_client = Client()
+        authorized_client.force_login(self.reader)
+        response = authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn("private", response["Cache-Control"])
+        again = authorized_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_stale_page_keeps_old_validator(self):
+        """Устаревшая копия не получает ETag новых данных."""
+        url = self.pages["post"]
+        self.guest_client.get(url)
+        self.post.text = "Новый текст"
+        self.post.save()
+        key = page_key(RequestFactory().get(url))
+        self.assertTrue(acquire_lock(key))
+        try:
+            stale = self.guest_client.get(url)
+        finally:
+            release_lock(key)
+        self.assertNotContains(stale, "Новый текст")
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=stale["ETag"])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, "Новый текст")
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.reader = User.objects.create_user(username="reader")
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_counters_follow_creates_and_deletes(self):
+        """Счетчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(author=self.author, text="Пост")
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text="Комментарий"
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).comments_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).comments_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_post_save_keeps_concurrent_counter(self):
+        """Сохранение поста не затирает счетчик, измененный после чтения."""
+        post = Post.objects.create(author=self.author, text="Пост")
+        stale = Post.objects.get(id=post.id)
+        Comment.objects.create(post=post, author=self.reader, text="Текст")
+        stale.text = "Новый текст"
+        stale.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text, "Новый текст")
+        self.assertEqual(post.comments_count, 1)
+
+    def test_profile_reads_stored_counter(self):
+        """Профиль берет число постов из счетчика без COUNT(*)."""
+        Post.objects.create(author=self.author, text="Пост")
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("posts:profile", kwargs={"username": self.author})
+            )
+        self.assertEqual(response.context["author_stats"].posts_count, 1)
+
+    def test_recount_stats_repairs_drift(self):
+        """Команда recount_stats исправляет разошедшиеся счетчики."""
+        post = Post.objects.create(author=self.author, text="Пост")
+        Comment.objects.create(post=post, author=self.reader, text="Текст")
+        AuthorStats.objects.filter(user=self.author).update(posts_count=7)
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+
+        out = StringIO()
+        call_command("recount_stats", stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        self.assertIn(
+            "AuthorStats.posts_count: исправлено строк 1", out.getvalue()
+        )
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+
+from .. import feed
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+POSTS_LIMIT = 10
+
+
+class FeedTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author")
+        self.star = User.objects.create_user(username="star")
+        self.user = User.objects.create_user(username="reader")
+        self.fan = User.objects.create_user(username="fan")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост раскладывается по лентам подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(author=self.author, text="Новый пост")
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.context["page_obj"][0], post)
+
+    def test_follow_backfills_and_unfollow_trims_feed(self):
+        """Подписка заполняет ленту, отписка ее очищает."""
+        Post.objects.create(author=self.author, text="Старый пост")
+        self.client.get(
+            reverse(
+                "posts:profile_follow",
+                kwargs={"username": self.author.username},
+            )
+        )
+        self.assertEqual(FeedEntry.objects.filter(user=self.user).count(), 1)
+        self.client.get(
+            reverse(
+                "posts:profile_unfollow",
+                kwargs={"username": self.author.username},
+            )
+        )
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+
+    @override_settings(TASKS_EAGER=False)
+    def test_side_effects_wait_for_workers(self):
+        """Раскладка по лентам выполняется исполнителем, а не запросом."""
+        Follow.objects.create(user=self.user, author=self.author)
+        tasks.run_pending()
+        post = Post.objects.create(author=self.author, text="Новый пост")
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        tasks.run_pending()
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists()
+        )
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_popular_author_is_merged_at_read_time(self):
+        """Посты популярного автора дочитываются при запросе ленты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=self.star)
+        Follow.objects.create(user=self.fan, author=self.star)
+        posts = [
+            Post.objects.create(
+                author=self.star if number % 2 else self.author,
+                text=f"Пост {number}",
+            )
+            for number in range(POSTS_LIMIT + 2)
+        ]
+        self.assertFalse(FeedEntry.objects.filter(author=self.star).exists())
+
+        first = self.client.get(reverse("posts:follow_index"))
+        first_page = first.context["page_obj"]
+        second = self.client.get(
+            reverse("posts:follow_index"),
+            {"cursor": first_page.next_cursor},
+        )
+        shown = list(first_page) + list(second.context["page_obj"])
+        self.assertEqual(shown, posts[::-1])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_rebuild_matches_fan_out(self):
+        """Перестройка лент дает те же записи, что и сигналы."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=self.star)
+        Follow.objects.create(user=self.fan, author=self.star)
+        for author in (self.author, self.star):
+            Post.objects.create(author=author, text="Пост")
+        entries = FeedEntry.objects.values_list("user", "post", "pub_date")
+        expected = set(entries)
+        feed.rebuild()
+        self.assertEqual(set(entries), expected)
+
+    def test_seed_data_builds_consistent_dataset(self):
+        """seed_data создает данные и пересчитывает производные."""
+        call_command("seed_data", scale=0.001, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertTrue(FeedEntry.objects.exists())
+        author = User.objects.filter(posts__isnull=False).first()
+        self.assertEqual(author.stats.posts_count, author.posts.count())
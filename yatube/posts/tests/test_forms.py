@@ -6,11 +6,12 @@ from django.test import Client, TestCase
 from django.urls import reverse
 
 from ..models import Post, Group, Comment
+from .test_thumbnails import TempMediaMixin
 
 User = get_user_model()
 
 
-class PostCreateFormTests(TestCase):
+class PostCreateFormTests(TempMediaMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
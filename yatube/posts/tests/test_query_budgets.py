@@ -0,0 +1,143 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.queries import QueryBudgetMixin
+
+from .. import urls
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Имя URL -> (метод, бюджет запросов). Бюджет считается для полной
+# страницы авторизованного пользователя, включая сессию и его самого.
+QUERY_BUDGETS = {
+    "index": ("get", 3),
+    "index_items": ("get", 3),
+    "group_list": ("get", 4),
+    "group_items": ("get", 4),
+    "group_feed": ("get", 4),
+    "profile": ("get", 4),
+    "profile_items": ("get", 4),
+    "profile_feed": ("get", 4),
+    "post_detail": ("get", 3),
+    "post_comments": ("get", 4),
+    "post_create": ("get", 3),
+    "post_edit": ("get", 5),
+    "add_comment": ("post", 6),
+    "follow_index": ("get", 4),
+    "follow_items": ("get", 4),
+    "follow_feed": ("get", 5),
+    "profile_follow": ("get", 10),
+    "profile_unfollow": ("get", 8),
+    "search": ("get", 3),
+}
+
+
+# Побочные эффекты записи уходят в очередь задач, как на сервере:
+# бюджет считается для самого запроса, без работы исполнителей.
+@override_settings(TASKS_EAGER=False)
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """У каждого URL приложения posts есть бюджет запросов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(12):
+            cls.post = Post.objects.create(
+                author=cls.author, text=f"Пост {number}", group=cls.group
+            )
+        for number in range(12):
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create_user(username=f"user{number}"),
+                text="Комментарий",
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def request_args(self, name):
+        """URL и данные запроса для каждого маршрута."""
+        post_id = {"post_id": self.post.id}
+        reader = {"username": self.reader.username}
+        urls_and_data = {
+            "index": (reverse("posts:index"), None),
+            "index_items": (reverse("posts:index_items"), None),
+            "group_list": (
+                reverse("posts:group_list", kwargs={"slug": "group"}),
+                None,
+            ),
+            "group_items": (
+                reverse("posts:group_items", kwargs={"slug": "group"}),
+                None,
+            ),
+            "group_feed": (
+                reverse("posts:group_feed", args=["group", "atom"]),
+                None,
+            ),
+            "profile": (
+                reverse("posts:profile", kwargs={"username": "author"}),
+                None,
+            ),
+            "profile_items": (
+                reverse("posts:profile_items", kwargs={"username": "author"}),
+                None,
+            ),
+            "profile_feed": (
+                reverse("posts:profile_feed", args=["author", "atom"]),
+                None,
+            ),
+            "post_detail": (
+                reverse("posts:post_detail", kwargs=post_id),
+                None,
+            ),
+            "post_comments": (
+                reverse("posts:post_comments", kwargs=post_id),
+                None,
+            ),
+            "post_create": (reverse("posts:post_create"), None),
+            "post_edit": (reverse("posts:post_edit", kwargs=post_id), None),
+            "add_comment": (
+                reverse("posts:add_comment", kwargs=post_id),
+                {"text": "Новый комментарий"},
+            ),
+            "follow_index": (reverse("posts:follow_index"), None),
+            "follow_items": (reverse("posts:follow_items"), None),
+            "follow_feed": (
+                reverse("posts:follow_feed", args=["atom"]),
+                None,
+            ),
+            "profile_follow": (
+                reverse("posts:profile_follow", kwargs=reader),
+                None,
+            ),
+            "profile_unfollow": (
+                reverse("posts:profile_unfollow", kwargs=reader),
+                None,
+            ),
+            "search": (reverse("posts:search"), {"q": "пост"}),
+        }
+        return urls_and_data[name]
+
+    def test_every_url_has_a_budget(self):
+        """Новый URL без бюджета роняет тест."""
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+
+    def test_urls_stay_within_budget(self):
+        """Страницы укладываются в бюджет и не содержат N+1."""
+        for name, (method, budget) in QUERY_BUDGETS.items():
+            with self.subTest(url=name):
+                url, data = self.request_args(name)
+                with self.assertMaxQueries(budget):
+                    getattr(self.client, method)(url, data)
@@ -0,0 +1,91 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import COMMENTS_LIMIT
+
+User = get_user_model()
+
+# Полный проход по таблице без индекса и сортировка во временном дереве.
+FULL_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?\w+(?: AS \w+)?$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTest(TestCase):
+    """Запросы страниц ленты обслуживаются индексами."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author, text=f"Пост {number}", group=cls.group
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text="Комментарий"
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def assert_indexed(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT"):
+                continue
+            for detail in query_plan(sql):
+                self.assertNotRegex(detail, FULL_SCAN_RE, sql)
+                self.assertNotIn(TEMP_SORT, detail, sql)
+        return response
+
+    def test_feed_pages_use_indexes(self):
+        """Ни одна страница не читает таблицу целиком и не сортирует."""
+        pages = {
+            "index": reverse("posts:index"),
+            "group": reverse("posts:group_list", kwargs={"slug": "group"}),
+            "profile": reverse("posts:profile", kwargs={"username": "author"}),
+            "post": reverse(
+                "posts:post_detail", kwargs={"post_id": self.post.id}
+            ),
+            "follow": reverse("posts:follow_index"),
+        }
+        for name, url in pages.items():
+            with self.subTest(page=name):
+                response = self.assert_indexed(url)
+                page_obj = response.context.get("page_obj")
+                if page_obj is not None and page_obj.has_next():
+                    self.assert_indexed(url, {"cursor": page_obj.next_cursor})
+
+    def test_comment_pages_use_indexes(self):
+        """Комментарии поста листаются по индексу без сортировки."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.reader, text=f"Ответ {n}")
+            for n in range(COMMENTS_LIMIT + 5)
+        )
+        url = reverse("posts:post_comments", kwargs={"post_id": self.post.id})
+        page = self.assert_indexed(url).context["page"]
+        self.assertTrue(page.has_next())
+        self.assert_indexed(url, {"cursor": page.next_cursor})
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.replicas import REPLICA_PIN_COOKIE
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+def replicate(source="default", target="replica"):
+    """Копирует основную базу в реплику, как это сделала бы репликация.
+
+    Схему реплики не мигрируют: она приходит вместе с данными.
+    """
+    for alias in (source, target):
+        connections[alias].ensure_connection()
+    connections[source].connection.backup(connections[target].connection)
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class ReplicaRouterTest(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.post = Post.objects.create(author=self.author, text="Первый")
+        replicate()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_read_views_use_replica(self):
+        """Страницы читают реплику, пока запись до нее не дошла."""
+        Post.objects.create(author=self.author, text="Еще не в реплике")
+        url = reverse("posts:profile", kwargs={"username": "author"})
+        self.assertNotContains(self.client.get(url), "Еще не в реплике")
+        replicate()
+        self.assertContains(self.client.get(url), "Еще не в реплике")
+
+    def test_writes_go_to_primary_and_pin_the_visitor(self):
+        """После записи посетитель читает основную базу."""
+        response = self.client.post(
+            reverse("posts:add_comment", kwargs={"post_id": self.post.id}),
+            {"text": "Свой комментарий"},
+        )
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        self.assertTrue(Comment.objects.using("default").exists())
+        self.assertFalse(Comment.objects.using("replica").exists())
+
+        url = reverse("posts:post_comments", kwargs={"post_id": self.post.id})
+        self.assertContains(self.client.get(url), "Свой комментарий")
+        self.client.cookies.pop(REPLICA_PIN_COOKIE)
+        self.assertNotContains(self.client.get(url), "Свой комментарий")
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "test_cache",
+            }
+        }
+    )
+    def test_database_cache_uses_primary(self):
+        """Кэш в базе читается из основной и не привязывает к ней."""
+        call_command("createcachetable")
+        url = reverse("posts:profile", kwargs={"username": "author"})
+        for _ in range(2):
+            response = Client().get(url)
+            self.assertContains(response, "Первый")
+            self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    @override_settings(
+        REPLICA_DATABASES=[],
+        CACHE_DATABASE="replica",
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "separate_cache",
+            }
+        },
+    )
+    def test_database_cache_in_own_database(self):
+        """Таблица кэша создается и читается только в базе кэша."""
+        call_command("createcachetable", database="replica")
+        tables = {
+            alias: connections[alias].introspection.table_names()
+            for alias in ("default", "replica")
+        }
+        self.assertIn("separate_cache", tables["replica"])
+        self.assertNotIn("separate_cache", tables["default"])
+        url = reverse("posts:profile", kwargs={"username": "author"})
+        for _ in range(2):
+            self.assertContains(Client().get(url), "Первый")
+        with connections["replica"].cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM separate_cache")
+            self.assertGreater(cursor.fetchone()[0], 0)
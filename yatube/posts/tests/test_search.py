@@ -0,0 +1,111 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..search import SEARCH_TABLE, search_posts
+from ..utils import CURSOR_NEXT, encode_cursor
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        records, ordering = search_posts(query)
+        return list(records.order_by(*ordering))
+
+    def test_russian_word_forms_are_found(self):
+        """Запрос находит пост по другой форме того же слова."""
+        post = Post.objects.create(author=self.author, text="Про котиков")
+        Post.objects.create(author=self.author, text="Про собак")
+        self.assertEqual(self.found("котики"), [post])
+
+    def test_results_are_ranked(self):
+        """Более релевантный пост идет первым."""
+        once = Post.objects.create(
+            author=self.author, text="Кошка спит, а пес гуляет по двору"
+        )
+        twice = Post.objects.create(author=self.author, text="Кошка и кошки")
+        self.assertEqual(self.found("кошка"), [twice, once])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.create(author=self.author, text="Старый текст")
+        post.text = "Новый текст"
+        post.save()
+        self.assertEqual(self.found("старый"), [])
+        self.assertEqual(self.found("новый"), [post])
+        post.delete()
+        self.assertEqual(self.found("новый"), [])
+
+    def test_fts_syntax_in_query_is_not_interpreted(self):
+        """Операторы FTS5 в запросе не ломают поиск."""
+        Post.objects.create(author=self.author, text="NEAR AND OR")
+        for query in ('"', "AND", "text*", "NEAR(", "-"):
+            with self.subTest(query=query):
+                self.found(query)
+
+    def test_search_page_pages_by_cursor(self):
+        """Страница поиска листается курсором и сохраняет запрос."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f"Поиск номер {number}")
+            for number in range(15)
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+        url = reverse("posts:search")
+        response = self.guest_client.get(url, {"q": "поиска"})
+        page_obj = response.context["page_obj"]
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(response, "?q=%D0%BF")
+        response = self.guest_client.get(
+            url, {"q": "поиска", "cursor": page_obj.next_cursor}
+        )
+        self.assertEqual(len(response.context["page_obj"]), 5)
+
+    def test_search_page_ignores_page_number(self):
+        """Номер страницы в поиске не ломает выдачу: листает курсор."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f"Поиск номер {number}")
+            for number in range(15)
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+        response = self.guest_client.get(
+            reverse("posts:search"), {"q": "поиска", "page": 2}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context["page_obj"]), 10)
+
+    def test_invalid_rank_in_cursor_shows_first_page(self):
+        """Курсор с нечисловым рангом открывает первую страницу."""
+        Post.objects.create(author=self.author, text="Поиск")
+        url = reverse("posts:search")
+        for rank in ("abc", "1e999"):
+            with self.subTest(rank=rank):
+                cursor = encode_cursor(CURSOR_NEXT, [rank, 1])
+                response = self.guest_client.get(
+                    url, {"q": "поиск", "cursor": cursor}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(len(response.context["page_obj"]), 1)
+
+    def test_rebuild_indexes_existing_posts(self):
+        """Команда перестройки индексирует все посты."""
+        Post.objects.create(author=self.author, text="Проиндексирован")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        self.assertEqual(self.found("проиндексирован"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self.found("проиндексирован")), 1)
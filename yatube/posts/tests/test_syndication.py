@@ -0,0 +1,99 @@
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def read_feed(response):
+    return ElementTree.fromstring(b"".join(response.streaming_content))
+
+
+class SyndicationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f"Пост {number}", group=cls.group
+            )
+            for number in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_group_and_author_feeds(self):
+        """Atom и RSS отдают посты группы и автора, новые первыми."""
+        expected = [post.text for post in reversed(self.posts)]
+        urls = (
+            reverse("posts:group_feed", args=["group", "atom"]),
+            reverse("posts:profile_feed", args=["author", "atom"]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertIn("Last-Modified", response)
+                entries = read_feed(response).findall(f"{ATOM}entry")
+                self.assertEqual(
+                    [entry.find(f"{ATOM}title").text for entry in entries],
+                    expected,
+                )
+        rss = self.guest_client.get(
+            reverse("posts:group_feed", args=["group", "rss"])
+        )
+        self.assertEqual(len(read_feed(rss).findall("channel/item")), 3)
+        unknown = self.guest_client.get(
+            reverse("posts:group_feed", args=["group", "json"])
+        )
+        self.assertEqual(unknown.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Поллер с If-Modified-Since получает 304 без запросов к базе."""
+        url = reverse("posts:group_feed", args=["group", "atom"])
+        response = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            again = self.guest_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            )
+        self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+
+        self.posts[0].text = "Исправленный пост"
+        self.posts[0].save()
+        changed = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(changed.status_code, HTTPStatus.OK)
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только ее владельцу."""
+        url = reverse("posts:follow_feed", args=["atom"])
+        self.assertEqual(
+            self.guest_client.get(url).status_code, HTTPStatus.FOUND
+        )
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(url)
+        self.assertEqual(len(read_feed(response).findall(f"{ATOM}entry")), 3)
+        again = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+
+        Post.objects.create(author=self.author, text="Новый пост")
+        changed = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(len(read_feed(changed).findall(f"{ATOM}entry")), 4)
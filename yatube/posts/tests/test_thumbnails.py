@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..forms import PostForm
+from ..models import Post
+from ..thumbnails import CARD_WIDTHS, generate_for
+
+User = get_user_model()
+
+
+def make_image(name="picture.jpg", color=(200, 50, 50)):
+    buffer = BytesIO()
+    Image.new("RGB", (1200, 800), color).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+class TempMediaMixin:
+    """MEDIA_ROOT во временном каталоге на время тестов класса."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+class ThumbnailPipelineTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="author")
+        self.post = Post.objects.create(
+            author=self.user, text="Пост с картинкой", image=make_image()
+        )
+        self.guest_client = Client()
+
+    def test_page_uses_original_until_thumbnails_are_ready(self):
+        """До генерации миниатюр страница показывает исходную картинку."""
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertContains(response, self.post.image.url)
+
+    def test_generated_thumbnails_are_stored_and_rendered(self):
+        """Миниатюры сохраняются в посте и выводятся без генерации."""
+        self.assertTrue(generate_for(self.post.id))
+        self.post.refresh_from_db()
+        card_url = self.post.thumbnail_urls["card"]
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertContains(response, card_url)
+
+    def test_listing_gets_responsive_variants(self):
+        """Карточка получает WebP и JPEG нескольких ширин с размерами."""
+        generate_for(self.post.id)
+        self.post.refresh_from_db()
+        thumbs = self.post.thumbnail_urls
+        self.assertEqual((thumbs["width"], thumbs["height"]), (960, 339))
+        response = self.guest_client.get(reverse("posts:index"))
+        for srcset in thumbs["srcset"].values():
+            self.assertEqual(srcset.count("w, "), len(CARD_WIDTHS) - 1)
+            self.assertContains(response, f'srcset="{srcset}"')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_edit_keeps_thumbnails_generated_meanwhile(self):
+        """Правка текста не затирает миниатюры, готовые после чтения."""
+        stale = Post.objects.get(id=self.post.id)
+        generate_for(self.post.id)
+        form = PostForm(data={"text": "Новый текст"}, instance=stale)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.post.refresh_from_db()
+        self.assertIn("card", self.post.thumbnail_urls)
+
+    def test_new_image_resets_thumbnails(self):
+        """Замена картинки сбрасывает устаревшие миниатюры."""
+        generate_for(self.post.id)
+        self.post.refresh_from_db()
+        form = PostForm(
+            data={"text": self.post.text},
+            files={"image": make_image("other.jpg", (0, 0, 255))},
+            instance=self.post,
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_urls, {})
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, FeedEntry, Follow, Group, Post
+from .test_thumbnails import TempMediaMixin, make_image
+
+User = get_user_model()
+
+
+class ContentTransferTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author")
+        self.reader = User.objects.create_user(username="reader")
+        self.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author,
+                text=f"Пост {number}",
+                group=self.group,
+                image=make_image() if number == 0 else "",
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=self.posts[1], author=self.reader, text="Комментарий"
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.dump = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dump)
+
+    def transfer(self, command, batch_size=2):
+        out = StringIO()
+        call_command(command, self.dump, batch_size=batch_size, stdout=out)
+        return out.getvalue()
+
+    def test_export_then_import_into_empty_site_keeps_ids(self):
+        """Выгрузка в пустую базу восстанавливает контент с теми же id."""
+        report = self.transfer("export_content")
+        self.assertIn("post: 3 строк", report)
+        image = self.posts[0].image.name
+        self.assertTrue(
+            os.path.exists(os.path.join(self.dump, "media", image))
+        )
+        expected = list(Post.objects.values("id", "text", "pub_date"))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        self.transfer("import_content")
+        self.assertEqual(
+            list(Post.objects.values("id", "text", "pub_date")), expected
+        )
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post_id, self.posts[1].id)
+        self.assertEqual(comment.author.username, "reader")
+        self.assertEqual(
+            Post.objects.get(image=image).author.username, "author"
+        )
+        self.assertEqual(
+            Post.objects.get(id=self.posts[1].id).comments_count, 1
+        )
+        self.assertTrue(FeedEntry.objects.filter(user__username="reader"))
+
+    def test_import_into_populated_site_remaps_references(self):
+        """Повторная загрузка добавляет посты с новыми id и ссылками."""
+        self.transfer("export_content")
+        self.transfer("import_content")
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 6)
+        copy = Comment.objects.exclude(post=self.posts[1]).get()
+        self.assertEqual(copy.post.text, "Пост 1")
+        self.assertGreater(copy.post_id, self.posts[-1].id)
+        self.assertEqual(copy.author, self.reader)
+        self.assertEqual(copy.post.group, self.group)
+        image = self.posts[0].image.name
+        self.assertEqual(Post.objects.filter(image=image).count(), 2)
+        self.assertTrue(
+            Post.objects.exclude(id=self.posts[0].id)
+            .get(image=image)
+            .thumbnail_urls
+        )
+
+    def test_import_keeps_other_image_with_same_name(self):
+        """Чужая картинка с тем же именем не подменяет загружаемую."""
+        self.transfer("export_content")
+        image = self.posts[0].image.name
+        with open(os.path.join(self.dump, "media", image), "wb") as file:
+            file.write(make_image(color=(10, 200, 10)).read())
+        self.transfer("import_content")
+
+        imported = Post.objects.exclude(id=self.posts[0].id).get(text="Пост 0")
+        self.assertNotEqual(imported.image.name, image)
+        with imported.image.open() as new, self.posts[0].image.open() as old:
+            self.assertNotEqual(new.read(), old.read())
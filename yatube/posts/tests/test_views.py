@@ -4,8 +4,17 @@ from django.urls import reverse
 from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.db import connection
 
-from ..models import Post, Group, Follow
+from ..models import Comment, Post, Group, Follow
+from ..utils import (
+    COMMENTS_LIMIT,
+    CURSOR_NEXT,
+    EstimatedPaginator,
+    encode_cursor,
+    estimated_count,
+)
+from .test_thumbnails import TempMediaMixin
 
 User = get_user_model()
 
@@ -13,7 +22,7 @@ POST_COUNT = 1
 POSTS_LIMIT = 10
 
 
-class TaskPagesTests(TestCase):
+class TaskPagesTests(TempMediaMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -30,6 +39,7 @@ class TaskPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -167,7 +177,7 @@ class TaskPagesTests(TestCase):
         """Проверка работы кэширования."""
         cache1 = self.authorized_client.get(reverse("posts:index")).content
         form_data = {
-            "group": self.group,
+            "group": self.group.id,
             "text": "кэш",
         }
         self.authorized_client.post(
@@ -204,6 +214,7 @@ class PaginatorViewsTest(TestCase):
         Post.objects.bulk_create(cls.objects, cls.posts_count)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -223,6 +234,208 @@ class PaginatorViewsTest(TestCase):
             self.posts_count % POSTS_LIMIT,
         )
 
+    def test_cursor_pages_walk_forward_and_back(self):
+        """Курсорная пагинация отдает следующую и предыдущую страницы."""
+        first = self.guest_client.get(reverse("posts:index"))
+        first_page = first.context["page_obj"]
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+
+        second = self.guest_client.get(
+            reverse("posts:index"),
+            {"cursor": first_page.next_cursor},
+        )
+        second_page = second.context["page_obj"]
+        self.assertEqual(len(second_page), self.posts_count % POSTS_LIMIT)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(
+            set(post.id for post in first_page).isdisjoint(
+                post.id for post in second_page
+            )
+        )
+
+        back = self.guest_client.get(
+            reverse("posts:index"),
+            {"cursor": second_page.previous_cursor},
+        )
+        self.assertEqual(
+            [post.id for post in back.context["page_obj"]],
+            [post.id for post in first_page],
+        )
+
+    def test_items_fragments_continue_full_pages(self):
+        """Фрагмент по курсору из полной страницы отдает ее продолжение."""
+        Follow.objects.create(
+            user=User.objects.create_user(username="reader"), author=self.user
+        )
+        follower = Client()
+        follower.force_login(User.objects.get(username="reader"))
+        listings = {
+            "index": (self.guest_client, "posts:index", {}, 1),
+            "group": (
+                self.guest_client,
+                "posts:group_list",
+                {"slug": self.group.slug},
+                2,
+            ),
+            "profile": (
+                self.guest_client,
+                "posts:profile",
+                {"username": self.user.username},
+                2,
+            ),
+            "follow": (follower, "posts:follow_index", {}, 4),
+        }
+        # Порция стоит одного запроса постов, плюс поиск группы или
+        # автора; в ленте подписок — сессия, пользователь и его авторы.
+        for name, (client, url_name, kwargs, queries) in listings.items():
+            with self.subTest(listing=name):
+                page = client.get(reverse(url_name, kwargs=kwargs))
+                items_url = page.context["items_url"]
+                cursor = page.context["page_obj"].next_cursor
+                self.assertContains(page, f"{items_url}?cursor={cursor}")
+
+                with self.assertNumQueries(queries):
+                    items = client.get(items_url, {"cursor": cursor})
+                self.assertNotContains(items, "<html")
+                self.assertEqual(
+                    [post.id for post in items.context["page_obj"]],
+                    [
+                        post.id
+                        for post in client.get(
+                            reverse(url_name, kwargs=kwargs),
+                            {"cursor": cursor},
+                        ).context["page_obj"]
+                    ],
+                )
+
+    def test_page_numbers_are_elided(self):
+        """Выводятся только соседние и крайние номера страниц."""
+        paginator = EstimatedPaginator(
+            Post.objects.order_by("-id"), POSTS_LIMIT, count=1000
+        )
+        gap = paginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50)),
+            [1, gap, 48, 49, 50, 51, 52, gap, 100],
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(2)),
+            [1, 2, 3, 4, gap, 100],
+        )
+
+    def test_count_is_estimated_without_count_query(self):
+        """Число постов берется из статистики или из кэша."""
+        posts = Post.objects.all()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        with self.assertNumQueries(1):
+            self.assertEqual(estimated_count(posts), self.posts_count)
+
+        group_posts = posts.filter(group=self.group)
+        estimated_count(group_posts)
+        with self.assertNumQueries(0):
+            self.assertEqual(estimated_count(group_posts), self.posts_count)
+
+    def test_wrong_estimate_falls_back_to_exact_count(self):
+        """Завышенная оценка не приводит на пустую страницу."""
+        page = EstimatedPaginator(
+            Post.objects.order_by("-id"), POSTS_LIMIT, count=1000
+        ).get_page(50)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page), self.posts_count % POSTS_LIMIT)
+        self.assertFalse(page.has_next())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор приводит на первую страницу."""
+        cursors = (
+            "не-курсор",
+            encode_cursor(CURSOR_NEXT, ["не дата", 1]),
+            encode_cursor(CURSOR_NEXT, [1]),
+            encode_cursor(CURSOR_NEXT, ["2020-01-01T00:00:00", 2**70]),
+            encode_cursor(CURSOR_NEXT, [["2020-01-01T00:00:00"], 1]),
+        )
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(
+                    reverse("posts:index"), {"cursor": cursor}
+                )
+                self.assertEqual(
+                    len(response.context["page_obj"]), POSTS_LIMIT
+                )
+
+    def test_stale_cursor_returns_first_page(self):
+        """Курсор на удаленные посты приводит на первую страницу."""
+        first = self.guest_client.get(reverse("posts:index"))
+        first_page = first.context["page_obj"]
+        Post.objects.exclude(id__in=[post.id for post in first_page]).delete()
+        response = self.guest_client.get(
+            reverse("posts:index"), {"cursor": first_page.next_cursor}
+        )
+        page_obj = response.context["page_obj"]
+        self.assertEqual(len(page_obj), POSTS_LIMIT)
+        self.assertFalse(page_obj.has_previous())
+
+
+class CommentsFragmentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="noname")
+        cls.post = Post.objects.create(author=cls.user, text="Текст поста")
+        cls.comments_count = COMMENTS_LIMIT + 5
+        for number in range(cls.comments_count):
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create_user(username=f"user{number}"),
+                text=f"Комментарий {number}",
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse(
+            "posts:post_comments", kwargs={"post_id": self.post.id}
+        )
+
+    def test_post_page_does_not_render_comments(self):
+        """Страница поста не читает комментарии, а ссылается на фрагмент."""
+        response = self.guest_client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.id})
+        )
+        self.assertNotContains(response, "Комментарий 0")
+        self.assertContains(response, self.url)
+
+    def test_comments_are_loaded_in_batches(self):
+        """Фрагменты отдают комментарии порциями, новые первыми."""
+        with self.assertNumQueries(2):
+            first = self.guest_client.get(self.url)
+        first_page = first.context["page"]
+        self.assertEqual(len(first_page), COMMENTS_LIMIT)
+        self.assertEqual(
+            first_page[0].text, f"Комментарий {self.comments_count - 1}"
+        )
+        self.assertContains(first, f"?cursor={first_page.next_cursor}")
+
+        second = self.guest_client.get(
+            self.url, {"cursor": first_page.next_cursor}
+        )
+        second_page = second.context["page"]
+        self.assertEqual(
+            len(second_page), self.comments_count - COMMENTS_LIMIT
+        )
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            {comment.id for comment in [*first_page, *second_page]},
+            set(self.post.comments.values_list("id", flat=True)),
+        )
+
+    def test_unknown_post_returns_404(self):
+        response = self.guest_client.get(
+            reverse("posts:post_comments", kwargs={"post_id": 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
 
 class FollowTest(TestCase):
     def setUp(self):
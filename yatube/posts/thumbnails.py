@@ -0,0 +1,93 @@
+"""Предварительная генерация миниатюр для Post.image.
+
+Миниатюры строятся не во время рендеринга шаблона, а после сохранения
+поста: представление ставит задачу posts.tasks.generate_thumbnails
+в очередь core.tasks. Готовые URL записываются в Post.thumbnails,
+и шаблоны только читают их.
+
+Для карточки строится несколько ширин в WebP и JPEG: шаблон отдает их
+через <picture> и srcset, и браузер сам выбирает подходящий файл.
+"""
+import json
+import logging
+from typing import Any, Dict
+
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from .cache import invalidate_post
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+# Карточка поста: пропорции кадра и ширины для srcset. Самая большая
+# ширина в JPEG — запасной src для браузеров без srcset и <picture>.
+CARD_SIZE = (960, 339)
+CARD_WIDTHS = (320, 640, 960)
+CARD_OPTIONS = {"crop": "center", "upscale": True}
+
+# Ключ в Post.thumbnails -> формат sorl. AVIF в sorl-thumbnail 12.7 не
+# поддерживается, поэтому современный формат здесь только WebP.
+CARD_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+CARD_QUALITY = 80
+
+
+def card_geometry(width: int) -> str:
+    full_width, full_height = CARD_SIZE
+    return f"{width}x{round(width * full_height / full_width)}"
+
+
+def render_thumbnails(image) -> Dict[str, Any]:
+    """Строит все варианты карточки и возвращает их URL и размеры.
+
+    Результат: {"card": url, "width": w, "height": h,
+    "srcset": {"webp": "url 320w, ...", "jpeg": "..."}}.
+    """
+    variants = {
+        (key, width): get_thumbnail(
+            image,
+            card_geometry(width),
+            format=thumbnail_format,
+            quality=CARD_QUALITY,
+            **CARD_OPTIONS,
+        )
+        for key, thumbnail_format in CARD_FORMATS.items()
+        for width in CARD_WIDTHS
+    }
+    fallback = variants["jpeg", max(CARD_WIDTHS)]
+    return {
+        "card": fallback.url,
+        "width": fallback.width,
+        "height": fallback.height,
+        "srcset": {
+            key: ", ".join(
+                f"{variants[key, width].url} {width}w" for width in CARD_WIDTHS
+            )
+            for key in CARD_FORMATS
+        },
+    }
+
+
+def save_thumbnails(post_id: int, image_name: str, urls: dict) -> bool:
+    """Записывает URL, если у поста все еще та же картинка."""
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        thumbnails=json.dumps(urls), updated=timezone.now()
+    )
+    if updated:
+        post = Post.objects.only("id", "author_id", "group_id").get(pk=post_id)
+        invalidate_post(post)
+    return bool(updated)
+
+
+def generate_for(post_id: int) -> bool:
+    """Генерирует миниатюры одного поста.
+
+    Ошибки не перехватываются: очередь задач запишет их и повторит
+    попытку.
+    """
+    post = Post.objects.only("id", "image").filter(pk=post_id).first()
+    if post is None or not post.image:
+        return False
+    urls = render_thumbnails(post.image)
+    return save_thumbnails(post.id, post.image.name, urls)
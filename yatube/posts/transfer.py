@@ -0,0 +1,72 @@
+"""Формат выгрузки контента для команд export_content и import_content.
+
+Выгрузка — каталог с файлом CONTENT_FILE в формате JSON Lines и
+каталогом MEDIA_DIR с картинками постов. Каждая строка — одна запись:
+{"model": "post", "id": 5, ...поля}. Секции идут в порядке SECTIONS,
+поэтому при загрузке любая ссылка указывает на уже загруженную строку.
+
+Производные данные (счетчики, ленты, поисковый индекс, миниатюры) не
+выгружаются: import_content пересчитывает их после загрузки, а
+миниатюры ставит в очередь задач.
+"""
+import datetime
+from typing import Dict
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+CONTENT_FILE = "content.jsonl"
+MEDIA_DIR = "media"
+
+# Имя секции -> (модель, выгружаемые поля кроме id).
+SECTIONS = {
+    "user": (
+        User,
+        (
+            "username",
+            "first_name",
+            "last_name",
+            "email",
+            "password",
+            "date_joined",
+        ),
+    ),
+    "group": (Group, ("title", "slug", "description")),
+    "post": (
+        Post,
+        ("text", "pub_date", "updated", "author_id", "group_id", "image"),
+    ),
+    "comment": (Comment, ("post_id", "author_id", "text", "created")),
+    "follow": (Follow, ("user_id", "author_id")),
+}
+
+
+class ContentEncoder(DjangoJSONEncoder):
+    """Даты с микросекундами: DjangoJSONEncoder обрезает их до
+    миллисекунд, а ключи курсоров сравнивают даты точно."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class IdMap:
+    """Старый id -> новый.
+
+    Новые строки получают id = старый id + offset, где offset — больший
+    id в таблице до загрузки, поэтому словарь нужен только для строк,
+    совпавших с существующими (пользователь по username, группа по
+    slug). Память не растет с числом загружаемых постов и комментариев.
+    """
+
+    def __init__(self, offset: int):
+        self.offset = offset
+        self.matched: Dict[int, int] = {}
+
+    def __getitem__(self, old_id: int) -> int:
+        return self.matched.get(old_id, old_id + self.offset)
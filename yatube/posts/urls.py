@@ -6,15 +6,44 @@ app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("items/", views.index_items, name="index_items"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
+    path("group/<slug:slug>/items/", views.group_items, name="group_items"),
+    path(
+        "group/<slug:slug>/feed/<str:feed_format>/",
+        views.group_feed,
+        name="group_feed",
+    ),
     path("profile/<str:username>/", views.profile, name="profile"),
+    path(
+        "profile/<str:username>/items/",
+        views.profile_items,
+        name="profile_items",
+    ),
+    path(
+        "profile/<str:username>/feed/<str:feed_format>/",
+        views.profile_feed,
+        name="profile_feed",
+    ),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path("create/", views.post_create, name="post_create"),
     path("posts/<int:post_id>/edit/", views.post_edit, name="post_edit"),
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
+    path("search/", views.post_search, name="search"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/items/", views.follow_items, name="follow_items"),
+    path(
+        "follow/feed/<str:feed_format>/",
+        views.follow_feed,
+        name="follow_feed",
+    ),
     path(
         "profile/<str:username>/follow/",
         views.profile_follow,
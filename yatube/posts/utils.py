@@ -1,12 +1,415 @@
-from django.core.paginator import Paginator, Page
-from django.db.models import QuerySet
+import base64
+import binascii
+import hashlib
+import json
+from collections.abc import Sequence
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
 
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import EmptyPage, Paginator, Page
+from django.db import DatabaseError, connections
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+from django.utils.functional import cached_property
+
+from core.cache import get_or_compute
 
 POSTS_LIMIT: int = 10
+POSTS_ORDERING: Tuple[str, ...] = ("-pub_date", "-id")
+COMMENTS_LIMIT: int = 20
+COMMENTS_ORDERING: Tuple[str, ...] = ("-created", "-id")
+
+CURSOR_NEXT: str = "n"
+CURSOR_PREVIOUS: str = "p"
+
+# Диапазон INTEGER в SQLite: большее число из курсора драйвер не
+# передаст в запрос и упадет с OverflowError.
+CURSOR_INT_MIN: int = -(2**63)
+CURSOR_INT_MAX: int = 2**63 - 1
+
+COUNT_CACHE_TIMEOUT: int = 5 * 60
+COUNT_STATS_NAME: str = "count"
+PAGES_ON_EACH_SIDE: int = 2
+PAGES_ON_ENDS: int = 1
+
+
+def table_estimate(records: QuerySet) -> Optional[int]:
+    """Число строк таблицы по статистике ANALYZE из sqlite_stat1.
+
+    Первое число в stat — количество строк в индексе, то есть во всей
+    таблице. Без статистики или не на SQLite возвращает None.
+    """
+    connection = connections[records.db]
+    if connection.vendor != "sqlite":
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+                [records.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    return int(row[0].split()[0])
+
+
+def estimated_count(records: QuerySet) -> int:
+    """Число записей без COUNT(*) на каждый запрос.
+
+    Для всей таблицы берется оценка из sqlite_stat1, для выборок —
+    COUNT(*), закэшированный на COUNT_CACHE_TIMEOUT.
+    """
+    if not records.query.where:
+        estimate = table_estimate(records)
+        if estimate is not None:
+            return estimate
+    try:
+        sql = str(records.order_by().query)
+    except EmptyResultSet:
+        return 0
+    key = f"count:{hashlib.md5(sql.encode()).hexdigest()}"
+    return get_or_compute(
+        key, records.count, COUNT_CACHE_TIMEOUT, name=COUNT_STATS_NAME
+    )
+
+
+class ElidedPage(Page):
+    @property
+    def elided_page_range(self) -> Iterator[Union[int, str]]:
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class EstimatedPaginator(Paginator):
+    """Paginator с приблизительным числом записей и окном страниц.
+
+    Вместо COUNT(*) число записей берется из count, если оно известно
+    (например, из счетчиков), или из estimated_count. Точный COUNT(*)
+    выполняется, только когда оценка может ошибиться заметно для
+    посетителя: на последней по оценке странице и на пустой странице.
+    """
+
+    ELLIPSIS = "…"
+
+    def __init__(self, object_list, per_page, count: Optional[int] = None):
+        super().__init__(object_list, per_page)
+        self.known_count = count
+        self.exact = False
+
+    @cached_property
+    def count(self) -> int:
+        if self.known_count is not None:
+            return self.known_count
+        return estimated_count(self.object_list)
+
+    def use_exact_count(self) -> None:
+        if not self.exact:
+            self.exact = True
+            self.__dict__["count"] = Paginator.count.func(self)
+            self.__dict__.pop("num_pages", None)
+
+    def validate_number(self, number) -> int:
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Оценка могла оказаться меньше настоящего числа записей.
+            if self.exact:
+                raise
+            self.use_exact_count()
+            return super().validate_number(number)
+
+    def page(self, number) -> Page:
+        number = self.validate_number(number)
+        if number >= self.num_pages and not self.exact:
+            self.use_exact_count()
+            number = min(number, self.num_pages)
+        page = super().page(number)
+        if not page.object_list and number > 1 and not self.exact:
+            self.use_exact_count()
+            page = super().page(self.num_pages)
+        return page
+
+    def _get_page(self, *args, **kwargs) -> Page:
+        return ElidedPage(*args, **kwargs)
+
+    def get_elided_page_range(
+        self,
+        number: int,
+        on_each_side: int = PAGES_ON_EACH_SIDE,
+        on_ends: int = PAGES_ON_ENDS,
+    ) -> Iterator[Union[int, str]]:
+        """Номера страниц вокруг number и по краям, пропуски — ELLIPSIS."""
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            yield from self.page_range
+            return
+        if number > on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
 
 
 def paginate(
-    page_number: int, records: QuerySet, posts_limit: int = POSTS_LIMIT
+    page_number: int,
+    records: QuerySet,
+    posts_limit: int = POSTS_LIMIT,
+    count: Optional[int] = None,
 ) -> Page:
-    paginator = Paginator(records, posts_limit)
+    paginator = EstimatedPaginator(records, posts_limit, count)
     return paginator.get_page(page_number)
+
+
+def encode_cursor(direction: str, values: List[Any]) -> str:
+    """Упаковывает направление и значения ключа в непрозрачный токен."""
+    payload = json.dumps([direction, values], separators=(",", ":"))
+    token = base64.urlsafe_b64encode(payload.encode())
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Optional[Tuple[str, List[Any]]]:
+    """Распаковывает токен; для испорченного токена возвращает None."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+        return None
+    if not isinstance(values, list):
+        return None
+    return direction, values
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации.
+
+    Повторяет ту часть интерфейса Page, которой пользуются шаблоны,
+    но вместо номеров страниц отдает токены соседних страниц.
+    """
+
+    cursor_mode = True
+
+    def __init__(
+        self,
+        object_list: list,
+        paginator: "CursorPaginator",
+        has_next: bool,
+        has_previous: bool,
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(CURSOR_NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(CURSOR_PREVIOUS, self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-пагинация по упорядоченному набору полей.
+
+    Вместо LIMIT/OFFSET и COUNT(*) страница выбирается условием
+    «строго после ключа последней записи», поэтому стоимость запроса
+    не зависит от глубины страницы. Все поля ordering должны идти
+    в одном направлении, последним полем — уникальный id.
+    """
+
+    def __init__(
+        self,
+        records: QuerySet,
+        per_page: int = POSTS_LIMIT,
+        ordering: Tuple[str, ...] = POSTS_ORDERING,
+        transform: Optional[Callable[[Any], Any]] = None,
+        keys: Optional[Tuple[str, ...]] = None,
+    ):
+        self.records = records
+        self.per_page = per_page
+        self.ordering = ordering
+        self.descending = ordering[0].startswith("-")
+        self.fields = [field.lstrip("-") for field in ordering]
+        self.transform = transform
+        self.keys = keys or tuple(self.fields)
+
+    def key_for(self, obj: Any) -> Tuple[Any, ...]:
+        # Строки из values() — словари, объекты моделей — атрибуты.
+        if isinstance(obj, dict):
+            return tuple(obj[key] for key in self.keys)
+        return tuple(getattr(obj, key) for key in self.keys)
+
+    def cursor_for(self, direction: str, obj: Any) -> str:
+        values = []
+        for value in self.key_for(obj):
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            values.append(value)
+        return encode_cursor(direction, values)
+
+    def _seek(self, values: List[Any], after: bool) -> Q:
+        """Условие лексикографического сравнения ключа с values."""
+        lookup = "lt" if after == self.descending else "gt"
+        condition = Q()
+        for position, field in enumerate(self.fields):
+            step = Q(**{f"{field}__{lookup}": values[position]})
+            for prefix, value in zip(self.fields[:position], values):
+                step &= Q(**{prefix: value})
+            condition |= step
+        # Нестрогое условие на первое поле позволяет SQLite начать обход
+        # индекса сразу с нужной позиции, а не разбирать OR целиком.
+        bound = Q(**{f"{self.fields[0]}__{lookup}e": values[0]})
+        return bound & condition
+
+    @staticmethod
+    def _check_values(values: List[Any]) -> None:
+        for value in values:
+            if not isinstance(value, (str, int, float)):
+                raise TypeError(f"Invalid cursor value: {value!r}")
+            if isinstance(value, int) and not (
+                CURSOR_INT_MIN <= value <= CURSOR_INT_MAX
+            ):
+                raise ValueError(f"Cursor value out of range: {value}")
+
+    def _reverse_ordering(self) -> List[str]:
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def _rows(self, cursor: Optional[str]) -> Tuple[Optional[str], list]:
+        """Направление и до per_page + 1 записей в порядке обхода."""
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is not None and len(decoded[1]) != len(self.fields):
+            decoded = None
+        limit = self.per_page + 1
+
+        if decoded is not None:
+            direction, values = decoded
+            try:
+                self._check_values(values)
+                seek = self._seek(values, after=direction == CURSOR_NEXT)
+                records = self.records.filter(seek)
+            except (ValidationError, ValueError, TypeError):
+                decoded = None
+
+        if decoded is None:
+            direction = None
+            rows = list(self.records.order_by(*self.ordering)[:limit])
+        elif direction == CURSOR_NEXT:
+            rows = list(records.order_by(*self.ordering)[:limit])
+        else:
+            rows = list(records.order_by(*self._reverse_ordering())[:limit])
+
+        if self.transform is not None:
+            rows = [self.transform(row) for row in rows]
+        return direction, rows
+
+    def _page(self, direction: Optional[str], rows: list) -> CursorPage:
+        if direction == CURSOR_PREVIOUS:
+            has_previous = len(rows) > self.per_page
+            rows = rows[: self.per_page]
+            rows.reverse()
+            return CursorPage(
+                rows, self, has_next=True, has_previous=has_previous
+            )
+        return CursorPage(
+            rows[: self.per_page],
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=direction is not None,
+        )
+
+    def get_page(self, cursor: Optional[str] = None) -> CursorPage:
+        direction, rows = self._rows(cursor)
+        if direction is not None and not rows:
+            # Записи за курсором удалили: вместо пустой страницы
+            # показываем первую.
+            direction, rows = self._rows(None)
+        return self._page(direction, rows)
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Сливает несколько курсорных потоков с общим ключом в один.
+
+    Каждый поток читает не больше per_page + 1 записей после курсора,
+    затем записи объединяются по ключу. Все потоки должны отдавать
+    объекты с одинаковыми атрибутами ключа keys.
+    """
+
+    def __init__(
+        self,
+        paginators: List[CursorPaginator],
+        per_page: int = POSTS_LIMIT,
+        keys: Tuple[str, ...] = ("pub_date", "id"),
+    ):
+        self.paginators = paginators
+        self.per_page = per_page
+        self.keys = keys
+        self.fields = list(keys)
+        self.descending = paginators[0].descending
+
+    def _rows(self, cursor: Optional[str]) -> Tuple[Optional[str], list]:
+        direction = None
+        merged = {}
+        for paginator in self.paginators:
+            direction, rows = paginator._rows(cursor)
+            for row in rows:
+                merged.setdefault(self.key_for(row), row)
+        reverse = self.descending != (direction == CURSOR_PREVIOUS)
+        keys = sorted(merged, reverse=reverse)[: self.per_page + 1]
+        return direction, [merged[key] for key in keys]
+
+
+def paginate_request(
+    request: HttpRequest,
+    records: QuerySet,
+    posts_limit: int = POSTS_LIMIT,
+    cursor_paginator: Optional[CursorPaginator] = None,
+    count: Optional[int] = None,
+):
+    """Выбирает режим пагинации по параметрам запроса.
+
+    По умолчанию используется курсор (?cursor=), старый режим ?page=
+    сохранен для совместимости со ссылками на номера страниц. count —
+    уже известное число записей, например из счетчиков.
+    """
+    page_number = request.GET.get("page")
+    if page_number is not None:
+        return paginate(page_number, records, posts_limit, count)
+    if cursor_paginator is None:
+        cursor_paginator = CursorPaginator(records, posts_limit)
+    return cursor_paginator.get_page(request.GET.get("cursor"))
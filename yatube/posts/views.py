@@ -1,90 +1,282 @@
+from urllib.parse import urlencode
+
 from django.shortcuts import get_object_or_404, redirect
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.db.models import Exists, OuterRef
 from django.http import HttpResponse, HttpRequest
-
-from .models import Group, Post, User, Comment, Follow
+from django.urls import reverse
+
+from core.page_cache import (
+    cache_anonymous_page,
+    conditional_page,
+    tag_response,
+)
+from core.replicas import replica_reads
+
+from . import counters, feed, search, syndication, tasks
+from .cache import (
+    POSTS_TAG,
+    author_tag,
+    comments_tag,
+    follows_tag,
+    group_tag,
+    listing_tags,
+    post_tag,
+)
+from .models import Group, Post, User, Follow
 from .forms import PostForm, CommentForm
-from .utils import paginate
+from .utils import (
+    COMMENTS_LIMIT,
+    COMMENTS_ORDERING,
+    CursorPaginator,
+    paginate_request,
+)
+
+
+def render_items(
+    request: HttpRequest, template: str, page_obj, items_url: str, **extra
+) -> HttpResponse:
+    """Фрагмент со следующей порцией постов для бесконечной ленты.
+
+    Полная страница выводит посты тем же шаблоном, поэтому фрагмент
+    совпадает с ее списком постов.
+    """
+    context = {"page_obj": page_obj, "items_url": items_url, **extra}
+    return render(request, template, context)
 
 
+@conditional_page
+@cache_anonymous_page
+@replica_reads
 def index(request: HttpRequest) -> HttpResponse:
     posts = Post.objects.select_related("author", "group")
 
-    page_number = request.GET.get("page")
-    page_obj = paginate(page_number, posts)
+    page_obj = paginate_request(request, posts)
 
     context = {
         "page_obj": page_obj,
+        "items_url": reverse("posts:index_items"),
         "index": True,
     }
-    return render(request, "posts/index.html", context)
+    response = render(request, "posts/index.html", context)
+    return tag_response(response, POSTS_TAG, *listing_tags(page_obj))
+
 
+@conditional_page
+@cache_anonymous_page
+@replica_reads
+def index_items(request: HttpRequest) -> HttpResponse:
+    posts = Post.objects.select_related("author", "group")
+    page_obj = CursorPaginator(posts).get_page(request.GET.get("cursor"))
+    response = render_items(
+        request,
+        "posts/includes/index_items.html",
+        page_obj,
+        request.path,
+    )
+    return tag_response(response, POSTS_TAG, *listing_tags(page_obj))
 
+
+@conditional_page
+@cache_anonymous_page
+@replica_reads
 def group_posts(request: HttpRequest, slug: str) -> HttpResponse:
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related("author")
 
-    page_number = request.GET.get("page")
-    page_obj = paginate(page_number, posts)
+    page_obj = paginate_request(request, posts)
 
     context = {
         "group": group,
         "page_obj": page_obj,
+        "items_url": reverse("posts:group_items", kwargs={"slug": slug}),
     }
-    return render(request, "posts/group_list.html", context)
+    response = render(request, "posts/group_list.html", context)
+    return tag_response(response, group_tag(group.id))
 
 
-def profile(request: HttpRequest, username: str) -> HttpResponse:
-    author = get_object_or_404(User, username=username)
+@conditional_page
+@cache_anonymous_page
+@replica_reads
+def group_items(request: HttpRequest, slug: str) -> HttpResponse:
+    group = get_object_or_404(Group.objects.only("id"), slug=slug)
+    posts = group.posts.select_related("author")
+    page_obj = CursorPaginator(posts).get_page(request.GET.get("cursor"))
+    response = render_items(
+        request, "posts/includes/post_list.html", page_obj, request.path
+    )
+    return tag_response(response, group_tag(group.id))
 
-    post_list = author.posts.all()
 
-    page_number = request.GET.get("page")
-    page_obj = paginate(page_number, post_list)
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=author).exists()
+@conditional_page
+def group_feed(
+    request: HttpRequest, slug: str, feed_format: str
+) -> HttpResponse:
+    group = get_object_or_404(Group, slug=slug)
+    posts = group.posts.select_related("author", "group").order_by(
+        "-pub_date", "-id"
+    )[: syndication.FEED_ITEMS_LIMIT]
+    response = syndication.feed_response(
+        request,
+        feed_format,
+        posts.iterator(),
+        title=f"Записи сообщества {group.title}",
+        link=reverse("posts:group_list", kwargs={"slug": slug}),
+        description=group.description,
     )
+    return tag_response(response, group_tag(group.id))
 
-    count_user_posts = author.posts.count()
+
+@conditional_page
+@cache_anonymous_page
+@replica_reads
+def profile(request: HttpRequest, username: str) -> HttpResponse:
+    authors = User.objects.select_related("stats")
+    if request.user.is_authenticated:
+        # Проверка подписки едет в том же запросе, что и автор.
+        authors = authors.annotate(
+            is_followed=Exists(
+                Follow.objects.filter(user=request.user, author=OuterRef("pk"))
+            )
+        )
+    author = get_object_or_404(authors, username=username)
+
+    author_stats = counters.get_author_stats(author)
+    post_list = author.posts.select_related("group")
+
+    page_obj = paginate_request(
+        request, post_list, count=author_stats.posts_count
+    )
 
     context = {
         "author": author,
-        "count_user_posts": count_user_posts,
+        "author_stats": author_stats,
         "page_obj": page_obj,
-        "following": following,
+        "items_url": reverse(
+            "posts:profile_items", kwargs={"username": username}
+        ),
+        "following": getattr(author, "is_followed", False),
     }
-    return render(request, "posts/profile.html", context)
+    response = render(request, "posts/profile.html", context)
+    return tag_response(
+        response, author_tag(author.id), *listing_tags(page_obj)
+    )
 
 
-def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
-    post = get_object_or_404(Post, id=post_id)
-    author = post.author
+@conditional_page
+@cache_anonymous_page
+@replica_reads
+def profile_items(request: HttpRequest, username: str) -> HttpResponse:
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    posts = author.posts.select_related("author", "group")
+    page_obj = CursorPaginator(posts).get_page(request.GET.get("cursor"))
+    response = render_items(
+        request,
+        "posts/includes/post_list.html",
+        page_obj,
+        request.path,
+        show_group=True,
+    )
+    return tag_response(
+        response, author_tag(author.id), *listing_tags(page_obj)
+    )
+
+
+@conditional_page
+def profile_feed(
+    request: HttpRequest, username: str, feed_format: str
+) -> HttpResponse:
+    author = get_object_or_404(User, username=username)
+    posts = author.posts.select_related("author", "group").order_by(
+        "-pub_date", "-id"
+    )[: syndication.FEED_ITEMS_LIMIT]
+    response = syndication.feed_response(
+        request,
+        feed_format,
+        posts.iterator(),
+        title=f"Посты пользователя {author.get_full_name() or username}",
+        link=reverse("posts:profile", kwargs={"username": username}),
+        description=f"Новые посты {username} на Yatube",
+    )
+    return tag_response(response, author_tag(author.id))
 
-    author_posts_count = author.posts.count()
 
-    comments = Comment.objects.filter(post_id=post_id)
+@conditional_page
+@cache_anonymous_page
+@replica_reads
+def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group"), id=post_id
+    )
+
     form = CommentForm()
 
+    # Комментарии подгружаются отдельно через post_comments, поэтому
+    # новый комментарий не сбрасывает кэш страницы поста.
     context = {
         "post": post,
-        "author_posts_count": author_posts_count,
+        "author_stats": counters.get_author_stats(post.author),
         "form": form,
-        "comments": comments,
     }
-    return render(request, "posts/post_detail.html", context)
+    response = render(request, "posts/post_detail.html", context)
+    return tag_response(
+        response,
+        post_tag(post.id),
+        author_tag(post.author_id),
+        *listing_tags([post]),
+    )
+
+
+@conditional_page
+@cache_anonymous_page
+@replica_reads
+def post_comments(request: HttpRequest, post_id: int) -> HttpResponse:
+    """Фрагмент с очередной порцией комментариев к посту."""
+    post = get_object_or_404(
+        Post.objects.only("id", "comments_count"), id=post_id
+    )
+    comments = post.comments.select_related("author")
+    page = CursorPaginator(
+        comments, COMMENTS_LIMIT, COMMENTS_ORDERING
+    ).get_page(request.GET.get("cursor"))
+
+    context = {
+        "post": post,
+        "page": page,
+        "first": "cursor" not in request.GET,
+    }
+    response = render(request, "posts/includes/comments.html", context)
+    return tag_response(response, post_tag(post.id), comments_tag(post.id))
+
+
+def post_search(request: HttpRequest) -> HttpResponse:
+    query = request.GET.get("q", "").strip()
+    records, ordering = search.search_posts(query)
+    records = records.select_related("author", "group").order_by(*ordering)
+
+    paginator = CursorPaginator(records, ordering=ordering)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
+
+    context = {
+        "query": query,
+        "page_obj": page_obj,
+        "extra_query": urlencode({"q": query}),
+    }
+    return render(request, "posts/search.html", context)
 
 
 @login_required
 def post_create(request: HttpRequest) -> HttpResponse:
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
 
     if not form.is_valid():
         return render(request, "posts/create_post.html", {"form": form})
 
     form.instance.author = request.user
-    form.save()
+    post = form.save()
+    if post.image:
+        tasks.generate_thumbnails.delay(post_id=post.id)
     return redirect("posts:profile", request.user.username)
 
 
@@ -110,6 +302,8 @@ def post_edit(request: HttpRequest, post_id: int) -> HttpResponse:
         return render(request, template, context)
 
     form.save()
+    if "image" in form.changed_data and post.image:
+        tasks.generate_thumbnails.delay(post_id=post.id)
     return redirect("posts:post_detail", post_id=post.id)
 
 
@@ -126,16 +320,68 @@ def add_comment(request: HttpRequest, post_id: int) -> HttpResponse:
 
 
 @login_required
+@replica_reads
 def follow_index(request: HttpRequest) -> HttpResponse:
     """Функция генерирует страницу с постами авторов,
     на которых подписан пользователь."""
     template = "posts/follow.html"
-    posts_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginate(request, posts_list)
-    context = {"page_obj": page_obj, "follow": True}
+    posts_list = Post.objects.filter(
+        author__following__user=request.user
+    ).select_related("author", "group")
+    page_obj = paginate_request(
+        request,
+        posts_list,
+        cursor_paginator=feed.feed_paginator(request.user),
+    )
+    context = {
+        "page_obj": page_obj,
+        "items_url": reverse("posts:follow_items"),
+        "follow": True,
+    }
     return render(request, template, context)
 
 
+@login_required
+@replica_reads
+def follow_items(request: HttpRequest) -> HttpResponse:
+    page_obj = feed.feed_paginator(request.user).get_page(
+        request.GET.get("cursor")
+    )
+    return render_items(
+        request,
+        "posts/includes/post_list.html",
+        page_obj,
+        request.path,
+        show_group=True,
+    )
+
+
+@login_required
+@conditional_page
+def follow_feed(request: HttpRequest, feed_format: str) -> HttpResponse:
+    """Лента постов авторов, на которых подписан пользователь."""
+    syndication.feed_class(feed_format)
+    page = feed.feed_paginator(
+        request.user, syndication.FEED_ITEMS_LIMIT
+    ).get_page()
+    response = syndication.feed_response(
+        request,
+        feed_format,
+        page,
+        title="Подписки",
+        link=reverse("posts:follow_index"),
+        description=f"Посты авторов, на которых подписан {request.user}",
+    )
+    authors = Follow.objects.filter(user=request.user).values_list(
+        "author_id", flat=True
+    )
+    return tag_response(
+        response,
+        follows_tag(request.user.id),
+        *(author_tag(author_id) for author_id in authors),
+    )
+
+
 @login_required
 def profile_follow(request, username):
     """Функция для подписки на авторов."""
@@ -1,6 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from . import tasks
+
 
 User = get_user_model()
 
@@ -9,3 +11,33 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ("first_name", "last_name", "username", "email")
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо для сброса пароля отправляется фоновой задачей.
+
+    В очередь попадают только id пользователя и адрес сайта: ссылку
+    со свежим токеном задача строит сама, поэтому токен не хранится
+    в таблице задач, даже если отправка не удалась.
+    """
+
+    def send_mail(
+        self,
+        subject_template_name,
+        email_template_name,
+        context,
+        from_email,
+        to_email,
+        html_email_template_name=None,
+    ):
+        tasks.send_password_reset.delay(
+            user_id=context["user"].pk,
+            domain=context["domain"],
+            site_name=context["site_name"],
+            protocol=context["protocol"],
+            subject_template_name=subject_template_name,
+            email_template_name=email_template_name,
+            from_email=from_email,
+            to_email=to_email,
+            html_email_template_name=html_email_template_name,
+        )
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+
+User = get_user_model()
+
+
+class PasswordResetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username="user", email="user@example.com", password="old-pass"
+        )
+
+    @override_settings(TASKS_EAGER=False)
+    def test_queued_email_does_not_store_token(self):
+        """В очереди лежит id пользователя, а не письмо со ссылкой."""
+        self.client.post(
+            reverse("users:password_reset_form"),
+            {"email": "user@example.com"},
+        )
+        job = Task.objects.get()
+        self.assertIn(f'"user_id": {self.user.pk}', job.kwargs)
+        self.assertNotIn("reset/", job.kwargs)
+        self.assertEqual(mail.outbox, [])
+
+    def test_email_link_resets_password(self):
+        """Ссылка из письма, собранного задачей, открывает смену пароля."""
+        self.client.post(
+            reverse("users:password_reset_form"),
+            {"email": "user@example.com"},
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        link = next(
+            word for word in mail.outbox[0].body.split() if "/reset/" in word
+        )
+        response = self.client.get(link, follow=True)
+        self.assertIn("new_password1", response.context["form"].fields)
@@ -11,6 +11,7 @@ from django.contrib.auth.views import (
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = "users"
 
@@ -43,7 +44,8 @@ urlpatterns = [
     path(
         "password_reset/",
         PasswordResetView.as_view(
-            template_name="users/password_reset_form.html"
+            template_name="users/password_reset_form.html",
+            form_class=QueuedPasswordResetForm,
         ),
         name="password_reset_form",
     ),
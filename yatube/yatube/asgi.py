@@ -0,0 +1,21 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Django 2.2 has no ASGI handler of its own, so the WSGI
+application is wrapped by core.asgi.AsgiAdapter. Run it with any ASGI
+server, for example::
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import AsgiAdapter
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+
+application = AsgiAdapter(get_wsgi_application(), settings.ASGI_THREADS)
@@ -0,0 +1,12 @@
+"""Settings profile selected by the YATUBE_ENV environment variable.
+
+``dev`` (the default) is for local work and tests, ``prod`` for
+deployment. A profile can also be chosen directly with
+DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+"""
+import os
+
+if os.environ.get("YATUBE_ENV", "dev") == "prod":
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
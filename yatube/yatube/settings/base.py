@@ -1,7 +1,8 @@
 """
-Django settings for yatube project.
+Django settings for yatube project shared by every environment.
 
 Generated by 'django-admin startproject' using Django 2.2.19.
+Environment-specific overrides live in dev.py and prod.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/topics/settings/
@@ -13,7 +14,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
 
 
 # Quick-start development settings - unsuitable for production
@@ -23,7 +26,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = "59pvv$@+^^)ota^s6i=_e+2s1tpq&@q#2hvg!^h#fcpjw63po+"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = False
 
 ALLOWED_HOSTS = [
     "localhost",
@@ -39,6 +42,7 @@ INSTALLED_APPS = [
     "posts.apps.PostsConfig",
     "users.apps.UsersConfig",
     "core.apps.CoreConfig",
+    "api.apps.ApiConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -46,10 +50,13 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "sorl.thumbnail",
-    "debug_toolbar",
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.profiling.ProfilingMiddleware",
+    "core.queries.QueryInspectorMiddleware",
+    "core.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -57,7 +64,6 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
 ROOT_URLCONF = "yatube.urls"
@@ -65,7 +71,8 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates that also time rendering for core.metrics.
+        "BACKEND": "core.metrics.InstrumentedTemplates",
         "DIRS": [TEMPLATES_DIR],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -83,6 +90,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "yatube.wsgi.application"
 
+# Threads that run Django under yatube.asgi. Connections waiting on slow
+# clients do not occupy them, so a few threads serve many connections.
+ASGI_THREADS = 8
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -92,8 +103,26 @@ DATABASES = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
     },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db.replica.sqlite3"),
+    },
 }
 
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+
+# Aliases the read-only views may read from, e.g. ["replica"]. Empty
+# means every query goes to the default database.
+REPLICA_DATABASES = []
+
+# Alias holding the DatabaseCache table, when that backend is used.
+CACHE_DATABASE = "default"
+
+# Upper bound of the replication lag, in seconds. After a write the
+# visitor reads the primary for this long, and the page cache does not
+# store pages rendered this soon after a change.
+REPLICA_MAX_LAG = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -152,6 +181,52 @@ CACHES = {
     }
 }
 
-INTERNAL_IPS = [
-    "127.0.0.1",
-]
+# PRAGMA statements run on every new SQLite connection, see
+# core.sqlite. Empty keeps the SQLite defaults.
+SQLITE_PRAGMAS = {}
+
+# Authors with more followers than this are not fanned out on write:
+# their posts are merged into the follow feed at read time.
+FEED_FANOUT_LIMIT = 1000
+
+# How many of an author's latest posts land in a new follower's feed.
+FEED_BACKFILL_LIMIT = 200
+
+# Anonymous full-page cache entries are invalidated by data changes;
+# the timeout only bounds how long unused pages occupy the cache.
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# How long a shared proxy may serve an anonymous page without
+# revalidating it (Cache-Control: s-maxage). Browsers always revalidate.
+PAGE_PROXY_MAX_AGE = 10
+
+# Side effects of writes (thumbnails, feed fan-out, search indexing,
+# email) go to the core.tasks queue, executed by run_workers. Eager
+# mode runs them inline in the calling request instead.
+TASKS_EAGER = False
+TASK_WORKERS = 4
+
+# A request that runs the same SQL shape this many times is reported
+# as an N+1; in DEBUG the report is raised instead of logged.
+QUERY_REPEAT_THRESHOLD = 5
+QUERY_REPEAT_RAISE = True
+
+# Share of requests to the PROFILE_NAMESPACES views that core.profiling
+# samples; 0 turns profiling off. Stacks are taken every PROFILE_INTERVAL
+# seconds and written to PROFILE_DIR, see the profile_report command.
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_NAMESPACES = ("posts", "users")
+PROFILE_INTERVAL = 0.005
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
+
+# With METRICS_TOKEN set, /metrics/ requires "Authorization: Bearer
+# <token>"; otherwise it answers only METRICS_ALLOWED_IPS, e.g. a
+# Prometheus agent on the same host. Behind a reverse proxy on the same
+# host every request comes from 127.0.0.1, so use the token there.
+# Each process keeps its metrics in memory; with METRICS_DIR
+# set, processes save them there every METRICS_FLUSH_INTERVAL seconds
+# and /metrics/ sums all processes.
+METRICS_ALLOWED_IPS = ("127.0.0.1", "::1")
+METRICS_TOKEN = None
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 10
@@ -0,0 +1,22 @@
+"""Local development: debug mode, the debug toolbar, inline tasks.
+
+Background tasks run inline unless YATUBE_TASKS_EAGER=0, so runserver
+works without run_workers; tests rely on this too.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ["debug_toolbar"]
+
+MIDDLEWARE = MIDDLEWARE + ["debug_toolbar.middleware.DebugToolbarMiddleware"]
+
+INTERNAL_IPS = [
+    "127.0.0.1",
+]
+
+TASKS_EAGER = os.environ.get("YATUBE_TASKS_EAGER", "1") == "1"
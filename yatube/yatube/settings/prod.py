@@ -0,0 +1,87 @@
+"""Production: configured from the environment.
+
+Required: YATUBE_SECRET_KEY and YATUBE_ALLOWED_HOSTS (comma-separated).
+Optional: YATUBE_DB_PATH, YATUBE_CACHE_DB_PATH, YATUBE_CONN_MAX_AGE,
+YATUBE_PROFILE_RATE, YATUBE_PROFILE_DIR, YATUBE_METRICS_DIR and
+YATUBE_METRICS_TOKEN.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES
+
+
+DEBUG = False
+
+SECRET_KEY = os.environ["YATUBE_SECRET_KEY"]
+
+ALLOWED_HOSTS = os.environ["YATUBE_ALLOWED_HOSTS"].split(",")
+
+# Keep connections open between requests instead of reconnecting on
+# every request.
+DATABASES = {
+    **DATABASES,
+    "default": {
+        **DATABASES["default"],
+        "NAME": os.environ.get(
+            "YATUBE_DB_PATH", os.path.join(BASE_DIR, "db.sqlite3")
+        ),
+        "CONN_MAX_AGE": int(os.environ.get("YATUBE_CONN_MAX_AGE", 60)),
+    },
+    # Every anonymous cache hit writes its statistics counter, so the
+    # cache gets its own file: SQLite lets one writer in at a time, and
+    # in the site's file cache writes would queue with posts and
+    # comments.
+    "cache": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get(
+            "YATUBE_CACHE_DB_PATH", os.path.join(BASE_DIR, "cache.sqlite3")
+        ),
+        "CONN_MAX_AGE": int(os.environ.get("YATUBE_CONN_MAX_AGE", 60)),
+    },
+}
+
+CACHE_DATABASE = "cache"
+
+# WAL lets readers work while a write is in progress; with WAL,
+# synchronous=NORMAL is still safe against corruption and skips most
+# fsyncs.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "temp_store": "MEMORY",
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+# Every worker process sees the same page cache and tag versions,
+# unlike the per-process LocMemCache. The table lives in the "cache"
+# database and is created by "manage.py createcachetable --database
+# cache". add() inserts under a unique key, so the rebuild locks of
+# core.cache admit one worker at a time; incr() is still get+set, so
+# the hit/miss statistics are approximate.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "yatube_cache",
+        "OPTIONS": {"MAX_ENTRIES": 50_000},
+    }
+}
+
+# Sampled request profiling is off unless a rate such as 0.01 is set.
+PROFILE_SAMPLE_RATE = float(os.environ.get("YATUBE_PROFILE_RATE", 0))
+PROFILE_DIR = os.environ.get(
+    "YATUBE_PROFILE_DIR", os.path.join(BASE_DIR, "profiles")
+)
+
+# Behind the reverse proxy every request looks local, so /metrics/ is
+# served only with the bearer token and is off without one.
+METRICS_TOKEN = os.environ.get("YATUBE_METRICS_TOKEN")
+METRICS_ALLOWED_IPS = ()
+
+# Worker processes share request metrics through per-process files;
+# clear the directory on deploy.
+METRICS_DIR = os.environ.get(
+    "YATUBE_METRICS_DIR", os.path.join(BASE_DIR, "metrics")
+)
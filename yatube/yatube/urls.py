@@ -19,13 +19,17 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics
+
 
 urlpatterns = [
     path("", include("posts.urls", namespace="posts")),
     path("auth/", include("users.urls", namespace="users")),
     path("about/", include("about.urls", namespace="about")),
+    path("api/v1/", include("api.urls", namespace="api")),
     path("admin/", admin.site.urls),
     path("auth/", include("django.contrib.auth.urls")),
+    path("metrics/", metrics, name="metrics"),
 ]
 
 handler404 = "core.views.page_not_found"